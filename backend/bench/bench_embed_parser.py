@@ -0,0 +1,192 @@
+"""Benchmark the Spotify embed page parser against saved fixtures.
+
+Compares the old whole-page approach (decode, DOTALL regex for
+__NEXT_DATA__, findall fallback) with the incremental parse_embed_html
+used by scrape_embed_tracks. Both share the same __NEXT_DATA__ layout walk,
+so they must return identical track lists on every fixture.
+
+    python backend/bench/bench_embed_parser.py [--repeat N] [--chunk BYTES]
+    python backend/bench/bench_embed_parser.py --write-fixtures
+
+Fixtures live in backend/bench/fixtures/*.html. All of them are synthetic:
+--write-fixtures generates them in the two layouts open.spotify.com/embed
+pages use (data.entity.trackList with title/subtitle, and the older
+tracks.items[].track), with made-up track names and padding. --scale adds a
+larger generated page in the current layout.
+
+Fails if the parsers disagree on any fixture, or if the streaming parser's
+peak memory exceeds the legacy parser's.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_parse(html_bytes):
+    """The pre-streaming scrape_spotify_tracks read path, kept as the baseline.
+
+    Decodes the whole page and cuts __NEXT_DATA__ out with a DOTALL regex,
+    as before; the layout walk is the current one, so both parsers
+    understand the same pages and only the reading strategy differs.
+    """
+    html = html_bytes.decode("utf-8", errors="replace")
+    m = re.search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.DOTALL)
+    if m:
+        try:
+            items = server._next_data_items(json.loads(m.group(1)))
+        except ValueError:
+            items = []
+        if items:
+            return server._embed_tracks(items)
+        html = m.group(1)
+    return server._regex_embed_tracks(html)
+
+
+def streaming_parse(html_bytes, chunk_size):
+    chunks = (html_bytes[i:i + chunk_size] for i in range(0, len(html_bytes), chunk_size))
+    return server.parse_embed_html(chunks)
+
+
+# ── Fixture generation ────────────────────────────────────────────────────────
+
+def _page(next_data, padding_kb):
+    """Wrap *next_data* in a page shaped like a Next.js embed page."""
+    filler = "".join(
+        f'<link rel="preload" href="/_next/static/chunks/{i:04x}-{"ab" * 16}.js" as="script"/>'
+        for i in range(padding_kb * 8)
+    )
+    styles = ".e-91000-text{font-family:var(--font-family)}" * (padding_kb * 20)
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charSet="utf-8"/>'
+        f"<title>Spotify Embed</title>{filler}<style>{styles}</style></head>"
+        '<body><div id="__next"><div class="EmbedWidget"></div></div>'
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(next_data, ensure_ascii=False)}</script>"
+        '<script src="/_next/static/chunks/main.js" defer=""></script></body></html>'
+    )
+
+
+def _entity_page(count):
+    """Current layout: data.entity.trackList with title / subtitle / uri."""
+    items = [
+        {
+            "uri": f"spotify:track:{i:022d}",
+            "uid": f"{i:016x}",
+            "title": f"Track Number {i} (Remastered 2011)",
+            "subtitle": f"Artist {i % 37}, Featured Singer {i % 11}",
+            "isExplicit": i % 5 == 0,
+            "duration": 180000 + i * 731,
+            "audioPreview": {"url": f"https://p.scdn.co/mp3-preview/{i:040x}"},
+        }
+        for i in range(count)
+    ]
+    return {
+        "props": {"pageProps": {"state": {
+            "data": {"entity": {
+                "type": "playlist", "name": "Benchmark Playlist", "uri": "spotify:playlist:bench",
+                "coverArt": {"sources": [{"url": "https://i.scdn.co/image/ab67", "width": 640}]},
+                "trackList": items,
+            }},
+            "settings": {"theme": "dark", "session": {"accessToken": "x" * 300}},
+        }}},
+        "page": "/embed/[type]/[id]", "buildId": "bench",
+    }
+
+
+def _items_page(count):
+    """Older layout: tracks.items[].track with name / artists / id."""
+    items = [
+        {"track": {
+            "id": f"{i:022d}",
+            "name": f"Album Song {i}",
+            "artists": [{"name": f"Band {i % 3}", "uri": "spotify:artist:x"}, {"name": "Guest"}],
+            "duration_ms": 200000,
+            "album": {"name": "Benchmark Album", "images": [{"url": "https://i.scdn.co/image/ab"}]},
+        }}
+        for i in range(count)
+    ]
+    return {"props": {"pageProps": {"state": {"tracks": {"items": items}}}}}
+
+
+def write_fixtures():
+    os.makedirs(FIXTURES, exist_ok=True)
+    pages = {
+        "playlist_100_synthetic.html": _page(_entity_page(100), padding_kb=40),
+        "album_20_synthetic.html": _page(_items_page(20), padding_kb=20),
+    }
+    for name, html in pages.items():
+        with open(os.path.join(FIXTURES, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"wrote {name} ({len(html) // 1024} KiB)")
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def _time(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def _peak(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--chunk", type=int, default=64 * 1024)
+    parser.add_argument("--scale", type=int, default=2000,
+                        help="also benchmark a synthetic playlist of this many tracks (0 = off)")
+    parser.add_argument("--write-fixtures", action="store_true")
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures()
+        return
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    if args.scale:
+        pages[f"synthetic_{args.scale}"] = _page(_entity_page(args.scale), 40).encode("utf-8")
+
+    print(f"{'fixture':<28}{'KiB':>7}{'tracks old/new':>16}{'legacy ms':>11}{'stream ms':>11}"
+          f"{'speedup':>9}{'legacy peak':>13}{'stream peak':>13}")
+    regressions = []
+    for name, html in pages.items():
+        legacy_s, legacy_tracks = _time(lambda: legacy_parse(html), args.repeat)
+        stream_s, stream_tracks = _time(lambda: streaming_parse(html, args.chunk), args.repeat)
+        legacy_peak = _peak(lambda: legacy_parse(html))
+        stream_peak = _peak(lambda: streaming_parse(html, args.chunk))
+        assert legacy_tracks == stream_tracks, f"{name}: parsers disagree"
+        counts = f"{len(legacy_tracks)}/{len(stream_tracks)}"
+        print(f"{name:<28}{len(html) // 1024:>7}{counts:>16}"
+              f"{legacy_s * 1000:>11.2f}{stream_s * 1000:>11.2f}"
+              f"{legacy_s / stream_s:>8.1f}x"
+              f"{legacy_peak // 1024:>10} KiB{stream_peak // 1024:>9} KiB")
+        if stream_peak > legacy_peak:
+            regressions.append(name)
+    assert not regressions, f"streaming peak memory above legacy: {', '.join(regressions)}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Requests per second against the local API, per connection mode.
+
+Starts the real DownloadRequestHandler twice on ephemeral ports: once forced
+back to HTTP/1.0 without compression (a new TCP connection per request, as
+before keep-alive), once as shipped (HTTP/1.1 keep-alive, gzip when the
+client sends Accept-Encoding).  The table of fake jobs gives /progress a
+realistic body with failed_tracks.
+
+    python backend/bench/bench_http.py [--requests N] [--jobs N]
+"""
+
+import argparse
+import gzip
+import http.client
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+ENDPOINTS = ("/health", "/status", "/progress?ids=all", "/logs/1")
+
+
+class LegacyHandler(server.DownloadRequestHandler):
+    """The handler as it behaved before keep-alive and gzip."""
+
+    protocol_version = "HTTP/1.0"
+    timeout = None
+    disable_nagle_algorithm = False
+
+    def _accepts_gzip(self):
+        return False
+
+
+def _populate(jobs, failed_per_job):
+    now = time.time()
+    with server._download_lock:
+        for n in range(1, jobs + 1):
+            dl_id = str(n)
+            server.ACTIVE_DOWNLOADS[dl_id] = {
+                "url": f"https://open.spotify.com/playlist/{n:022d}", "status": "completed",
+                "finished": True, "done": 500, "total": 500, "error": "", "started_at": now,
+                "collection": f"Playlist {n}", "priority": 10,
+                "failed_tracks": [
+                    {"name": f"Artist {i % 37} - Song Title {n}-{i}",
+                     "spotify_url": f"https://open.spotify.com/track/{n:011d}{i:011d}"}
+                    for i in range(failed_per_job)
+                ],
+            }
+            log = server.DOWNLOAD_LOGS[dl_id] = server.DownloadLog()
+            for i in range(server.LOG_TAIL_LINES):
+                log.append(f"  ✓ [{i + 1}/500] Done: Artist {i % 37} - Song Title {n}-{i}")
+            server._mark_changed(dl_id)
+
+
+def _serve(handler):
+    httpd = server.ReusableHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def _run(port, path, count, keep_alive):
+    """Issue *count* GETs; returns (requests per second, bytes on the wire per response)."""
+    headers = {"Accept-Encoding": "gzip"} if keep_alive else {}
+    conn = None
+    received = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        if conn is None:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("GET", path, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+        received += len(body)
+        if resp.getheader("Content-Encoding") == "gzip":
+            gzip.decompress(body)
+        if not keep_alive or resp.will_close:
+            conn.close()
+            conn = None
+    elapsed = time.perf_counter() - start
+    if conn is not None:
+        conn.close()
+    return count / elapsed, received / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint and mode")
+    parser.add_argument("--jobs", type=int, default=20, help="finished jobs in the progress table")
+    parser.add_argument("--failed", type=int, default=40, help="failed tracks per job")
+    args = parser.parse_args()
+
+    _populate(args.jobs, args.failed)
+    legacy = _serve(LegacyHandler)
+    current = _serve(server.DownloadRequestHandler)
+
+    print(f"{'endpoint':<20}{'HTTP/1.0 req/s':>15}{'bytes':>9}{'keep-alive req/s':>18}{'bytes':>9}{'speedup':>9}")
+    for path in ENDPOINTS:
+        before, before_bytes = _run(legacy.server_address[1], path, args.requests, keep_alive=False)
+        after, after_bytes = _run(current.server_address[1], path, args.requests, keep_alive=True)
+        print(f"{path:<20}{before:>15,.0f}{before_bytes:>9,.0f}{after:>18,.0f}{after_bytes:>9,.0f}"
+              f"{after / before:>8.1f}x")
+
+    legacy.shutdown()
+    current.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Replay recorded spotdl output through the progress parser.
+
+Compares the old per-line parse_spotdl_line (up to four regex searches and
+two lock acquisitions per line, plus a separate rate-limit scan) with
+SpotdlOutputParser, and reports lines per second for each transcript.
+
+    python backend/bench/bench_spotdl_parser.py [--repeat N]
+    python backend/bench/bench_spotdl_parser.py --write-fixtures
+
+Transcripts live in backend/bench/fixtures/spotdl_*.txt:
+
+* spotdl_v3_synthetic.txt / spotdl_v4_synthetic.txt are synthetic, written
+  by --write-fixtures: hundreds of tracks with made-up names, in the line
+  shapes the parser keys on. They measure throughput, not realism.
+* spotdl_v3_real.txt / spotdl_v4_real.txt are short, realistic transcripts
+  with real track names, progress-bar and status lines, rate-limit and
+  error messages. They were reconstructed by hand from spotdl 3.9 / 4.2
+  output formats, not captured from a live run; each file says so in its
+  ``#`` header, which the runner skips.
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BENCH_ID = "bench"
+
+
+def legacy_parse_line(line, download_id):
+    """parse_spotdl_line as it was before the single-pass classifier."""
+    m_total = re.search(r'(?:Found|Loaded)\s+(\d+)\s+(?:songs?|tracks?)', line, re.IGNORECASE)
+    if m_total:
+        with server._updating(download_id):
+            if int(m_total.group(1)) > server.ACTIVE_DOWNLOADS[download_id]["total"]:
+                server.ACTIVE_DOWNLOADS[download_id]["total"] = int(m_total.group(1))
+        return
+
+    if any(kw in line for kw in ("Downloaded", "Downloading", "Skipping", "Processing", "Searching")):
+        m_of = re.search(r'(\d+)\s*/\s*(\d+)', line)
+        if m_of:
+            done_val = int(m_of.group(1))
+            total_val = int(m_of.group(2))
+            with server._updating(download_id):
+                if done_val > server.ACTIVE_DOWNLOADS[download_id]["done"]:
+                    server.ACTIVE_DOWNLOADS[download_id]["done"] = done_val
+                if total_val > server.ACTIVE_DOWNLOADS[download_id]["total"]:
+                    server.ACTIVE_DOWNLOADS[download_id]["total"] = total_val
+            return
+
+    if re.match(r'\s*(Downloaded|Skipping|Failed|Error)\b', line, re.IGNORECASE):
+        with server._updating(download_id):
+            server.ACTIVE_DOWNLOADS[download_id]["done"] += 1
+
+
+def legacy_replay(lines):
+    """Returns the number of rate-limit lines (the old loop stopped at the first)."""
+    rate_limited = 0
+    for line in lines:
+        with server._updating(BENCH_ID):
+            server.DOWNLOAD_LOGS[BENCH_ID].append(line)
+        legacy_parse_line(line, BENCH_ID)
+        lower = line.lower()
+        if ("rate/request limit" in lower or "retry will occur after" in lower
+                or "too many requests" in lower):
+            rate_limited += 1
+    return rate_limited
+
+
+def batched_replay(lines):
+    rate_limited = 0
+    parser = server.SpotdlOutputParser(BENCH_ID)
+    for line in lines:
+        if parser.feed(line):
+            rate_limited += 1
+    parser.flush()
+    return rate_limited
+
+
+def _reset():
+    server.ACTIVE_DOWNLOADS[BENCH_ID] = {"status": "downloading", "done": 0, "total": 0}
+    server.DOWNLOAD_LOGS[BENCH_ID] = server.DownloadLog()
+
+
+# ── Transcript generation ─────────────────────────────────────────────────────
+
+def _v4_transcript(count):
+    lines = [
+        "Processing query: https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+        f"Found {count} songs in Today's Top Hits (Playlist)",
+    ]
+    for i in range(1, count + 1):
+        song = f'"Artist {i % 41} - Song Title {i}"'
+        if i % 17 == 0:
+            lines.append(f"Skipping {song[1:-1]} (file already exists) (duplicate)")
+        elif i % 29 == 0:
+            lines.append(f"LookupError: No results found for song: {song[1:-1]}")
+        else:
+            lines.append(f"Downloaded {song}: https://music.youtube.com/watch?v={i:011d}")
+        if i % 50 == 0:
+            lines.append(f"Downloading {i}/{count} songs")
+    lines.append(f"Downloaded {count} songs.")
+    return lines
+
+
+def _v3_transcript(count):
+    lines = ["Fetching Playlist...", f"Loaded {count} tracks"]
+    for i in range(1, count + 1):
+        name = f"Artist {i % 23} - Track {i}"
+        lines.append(f"Searching for {name} ({i}/{count})")
+        if i % 13 == 0:
+            lines.append(f"Skipping {name} (file already exists)")
+            continue
+        lines.append(f"Downloading {name} ({i}/{count})")
+        lines.append(f"  [youtube] {i:011d}: Downloading webpage")
+        lines.append(f"  Converting {name} to mp3")
+        lines.append(f"Downloaded {name} ({i}/{count})")
+    return lines
+
+
+def write_fixtures():
+    os.makedirs(FIXTURES, exist_ok=True)
+    for name, lines in (("spotdl_v4_synthetic.txt", _v4_transcript(500)),
+                        ("spotdl_v3_synthetic.txt", _v3_transcript(300))):
+        with open(os.path.join(FIXTURES, name), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"wrote {name} ({len(lines)} lines)")
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def _run(replay, lines, repeat):
+    elapsed = 0.0
+    for _ in range(repeat):
+        _reset()
+        start = time.perf_counter()
+        rate_limited = replay(lines)
+        elapsed += time.perf_counter() - start
+    info = server.ACTIVE_DOWNLOADS[BENCH_ID]
+    return len(lines) * repeat / elapsed, (info["done"], info["total"], rate_limited)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--write-fixtures", action="store_true")
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures()
+        return
+
+    print(f"{'transcript':<26}{'lines':>7}{'legacy lines/s':>16}{'batched lines/s':>17}{'speedup':>9}")
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "spotdl_*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            lines = [line.rstrip() for line in f if line.strip() and not line.startswith("#")]
+        legacy_rate, legacy_state = _run(legacy_replay, lines, args.repeat)
+        batched_rate, batched_state = _run(batched_replay, lines, args.repeat)
+        if legacy_state != batched_state:
+            print(f"  ! {os.path.basename(path)}: done/total/rate-limit lines differ {legacy_state} vs {batched_state}")
+        print(f"{os.path.basename(path):<26}{len(lines):>7}{legacy_rate:>16,.0f}{batched_rate:>17,.0f}"
+              f"{batched_rate / legacy_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,23 @@ import subprocess
 import sys
 import re
 import shutil
+import sqlite3
+import http.client
+import tempfile
+import unicodedata
+import zlib
 import collections
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+import contextlib
+import functools
+import gzip
+import heapq
+import importlib.util
+import itertools
+import multiprocessing
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote, unquote
 
 # ── Logging ────────────────────────────────────────────────────────────────────
 
@@ -34,28 +48,143 @@ DEFAULT_CONFIG = {
     "quality": "320",
     "port": 8765,
     "engine": "auto",  # "auto", "spotdl" or "ytdlp"
+    "max_parallel_tracks": 3,  # concurrent yt-dlp track downloads per playlist
+    "ytdlp_mode": "subprocess",  # "subprocess" or "embedded" (in-process YoutubeDL)
+    "spotdl_mode": "subprocess",  # "subprocess" or "worker" (persistent spotdl process)
+    "max_concurrent_jobs": 2,  # downloads running at once; the rest wait in the queue
+    "max_child_processes": 4,  # spotdl / yt-dlp processes running at once, server-wide
+    "skip_existing": True,  # consult the library index and skip tracks already on disk
+    "audio_mode": "mp3",  # "mp3" (always re-encode) or "passthrough" (keep good-enough sources)
 }
 
+MAX_PARALLEL_TRACKS_LIMIT = 16
+MAX_CONCURRENT_JOBS_LIMIT = 8
+MAX_CHILD_PROCESSES_LIMIT = 32
+
+
+def _normalize_config(cfg):
+    """Fill in keys added by newer versions and reset invalid enum values."""
+    for key, value in DEFAULT_CONFIG.items():
+        cfg.setdefault(key, value)
+    if cfg.get("engine") not in ("auto", "spotdl", "ytdlp"):
+        cfg["engine"] = DEFAULT_CONFIG["engine"]
+    if cfg.get("ytdlp_mode") not in ("subprocess", "embedded"):
+        cfg["ytdlp_mode"] = DEFAULT_CONFIG["ytdlp_mode"]
+    if cfg.get("spotdl_mode") not in ("subprocess", "worker"):
+        cfg["spotdl_mode"] = DEFAULT_CONFIG["spotdl_mode"]
+    if cfg.get("audio_mode") not in ("mp3", "passthrough"):
+        cfg["audio_mode"] = DEFAULT_CONFIG["audio_mode"]
+    return cfg
+
+
+class ConfigStore:
+    """config.json held in memory.
+
+    Reads cost one ``os.stat``: the file is re-parsed only when its mtime or
+    size changes (e.g. the user edited it by hand).  Writes go through a temp
+    file and ``os.replace`` so no reader ever sees half a file.  Subscribers
+    are called with the new config whenever its contents change.
+    """
 
-def load_config():
-    if os.path.exists(CONFIG_FILE):
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._config = None
+        self._stamp = None
+        self._subscribers = []
+        self.version = 0  # bumped whenever the contents change
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self):
         try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            with open(self.path, "r", encoding="utf-8") as f:
                 cfg = json.load(f)
-                # Migrate: ensure engine key exists
-                if "engine" not in cfg:
-                    cfg["engine"] = DEFAULT_CONFIG["engine"]
-                elif cfg.get("engine") not in ("auto", "spotdl", "ytdlp"):
-                    cfg["engine"] = DEFAULT_CONFIG["engine"]
-                return cfg
+            if isinstance(cfg, dict):
+                return _normalize_config(cfg)
         except Exception:
             pass
-    return DEFAULT_CONFIG.copy()
+        return DEFAULT_CONFIG.copy()
+
+    def get(self):
+        """Return a copy of the current config, reloading it if the file changed."""
+        stamp = self._file_stamp()
+        with self._lock:
+            if self._config is not None and stamp == self._stamp:
+                return dict(self._config)
+            config = self._read() if stamp is not None else DEFAULT_CONFIG.copy()
+            changed = self._replace(config, stamp)
+        if changed:
+            self._notify(config)
+        return dict(config)
+
+    def save(self, config):
+        config = _normalize_config(dict(config))
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        with self._lock:
+            changed = self._replace(config, self._file_stamp())
+        if changed:
+            self._notify(config)
+
+    def _replace(self, config, stamp):
+        """Install *config*; returns True if it differs from the previous one. Caller holds _lock."""
+        changed = self._config is not None and config != self._config
+        if self._config is None or changed:
+            self.version += 1
+        self._config = config
+        self._stamp = stamp
+        return changed
+
+    def subscribe(self, callback):
+        """Call *callback(config)* after every change to the config."""
+        self._subscribers.append(callback)
+
+    def _notify(self, config):
+        for callback in list(self._subscribers):
+            try:
+                callback(dict(config))
+            except Exception as e:
+                logger.warning(f"Config subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+CONFIG = ConfigStore(CONFIG_FILE)
+
+
+def load_config():
+    return CONFIG.get()
 
 
 def save_config(config):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    CONFIG.save(config)
+
+
+def get_config_int(config, key, upper):
+    """Return integer config *key* clamped to 1..*upper*, falling back to the default."""
+    try:
+        value = int(config.get(key, DEFAULT_CONFIG[key]))
+    except (TypeError, ValueError):
+        value = DEFAULT_CONFIG[key]
+    return max(1, min(value, upper))
+
+
+def get_max_parallel_tracks(config=None):
+    """Return the configured yt-dlp track concurrency, clamped to a sane range."""
+    if config is None:
+        config = load_config()
+    return get_config_int(config, "max_parallel_tracks", MAX_PARALLEL_TRACKS_LIMIT)
 
 
 # ── Active downloads ───────────────────────────────────────────────────────────
@@ -64,7 +193,164 @@ ACTIVE_DOWNLOADS = {}
 DOWNLOAD_LOGS = {}
 _download_counter = 0
 _download_lock = threading.Lock()
+_download_changed = threading.Condition(_download_lock)
+_state_version = 0
 _CLEANUP_AGE = 1800
+LOG_BUFFER_SIZE = 500
+LOG_TAIL_LINES = 50
+
+
+class DownloadLog:
+    """Bounded log of one download where every line carries a sequence number.
+
+    Iterating yields plain lines (like the deque it replaces); ``since``
+    lets streaming clients pick up only the lines they have not seen.
+    """
+
+    def __init__(self, maxlen=LOG_BUFFER_SIZE):
+        self._entries = collections.deque(maxlen=maxlen)
+        self.next_seq = 1
+
+    def append(self, line):
+        self._entries.append((self.next_seq, line))
+        self.next_seq += 1
+
+    def __iter__(self):
+        return (line for _, line in self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest line still buffered."""
+        return self.next_seq - len(self._entries)
+
+    def since(self, seq):
+        """Return [(seq, line), ...] for entries newer than *seq*."""
+        skip = max(0, seq - self.first_seq + 1)
+        return list(itertools.islice(self._entries, skip, None))
+
+    def tail(self, count):
+        """Return the newest *count* entries as [(seq, line), ...]."""
+        return list(itertools.islice(self._entries, max(0, len(self._entries) - count), None))
+
+
+TRACK_PENDING, TRACK_ACTIVE, TRACK_DONE, TRACK_FAILED, TRACK_SKIPPED = range(5)
+TRACK_STATUS_NAMES = ("pending", "active", "completed", "failed", "skipped")
+_track_row_versions = itertools.count(1)
+_track_table_ids = itertools.count(1)
+
+
+class TrackRow:
+    """State of one track in a job; slots keep 5,000-track playlists small."""
+
+    __slots__ = ("status", "attempts", "engine", "percent", "path", "error",
+                 "started_at", "finished_at", "version")
+
+    def __init__(self):
+        self.status = TRACK_PENDING
+        self.attempts = 0
+        self.engine = None
+        self.percent = 0
+        self.path = None
+        self.error = ""
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.version = 0
+
+
+class TrackTable:
+    """Per-job track state, one TrackRow per track index.
+
+    Every change stamps the row with a value from a process-wide counter, so
+    ``since(version)`` returns only the rows a client has not seen yet, even
+    across a fallback engine replacing the table.  Pending rows keep version
+    0 and are never sent.  Callers must hold _download_lock.
+    """
+
+    def __init__(self, tracks, engine):
+        self.id = next(_track_table_ids)
+        self.tracks = tracks  # shared with the worker, not copied
+        self.engine = engine
+        self.rows = [TrackRow() for _ in tracks]
+        self.active = {}  # index -> row of tracks being downloaded right now
+        self.version = 0
+
+    def _touch(self, row):
+        row.version = self.version = next(_track_row_versions)
+
+    def start(self, i):
+        row = self.rows[i]
+        row.status = TRACK_ACTIVE
+        row.attempts += 1
+        row.engine = self.engine
+        row.percent = 0
+        row.started_at = time.time()
+        self.active[i] = row
+        self._touch(row)
+
+    def progress(self, i, percent):
+        """Record download progress; returns True if anything changed."""
+        row = self.rows[i]
+        if row.status != TRACK_ACTIVE or row.percent == percent:
+            return False
+        row.percent = percent
+        self._touch(row)
+        return True
+
+    def finish(self, i, ok, error="", path=None, skipped=False):
+        row = self.rows[i]
+        row.status = TRACK_SKIPPED if skipped else TRACK_DONE if ok else TRACK_FAILED
+        row.error = error or ""
+        row.path = path
+        if ok:
+            row.percent = 100
+        row.finished_at = time.time()
+        self.active.pop(i, None)
+        self._touch(row)
+
+    def since(self, version):
+        """JSON-ready rows changed after *version*, in track order."""
+        return [
+            {
+                "i": i, "status": TRACK_STATUS_NAMES[row.status], "attempts": row.attempts,
+                "engine": row.engine, "percent": row.percent, "path": row.path, "error": row.error,
+                "started_at": row.started_at, "finished_at": row.finished_at,
+            }
+            for i, row in enumerate(self.rows) if row.version > version
+        ]
+
+    def active_tracks(self):
+        return sorted(self.active)
+
+    def track_progress(self):
+        return {i: row.percent for i, row in self.active.items() if row.percent}
+
+    def failed_tracks(self):
+        """The failed tracks (as passed in, in playlist order) for capture mode."""
+        return [
+            self.tracks[i] for i, row in enumerate(self.rows)
+            if row.status == TRACK_FAILED and self.tracks[i].get("name")
+        ]
+
+
+def _mark_changed(download_id):
+    """Bump versions and wake event streams. Caller must hold _download_lock."""
+    global _state_version
+    _state_version += 1
+    info = ACTIVE_DOWNLOADS.get(download_id)
+    if info is not None:
+        info["version"] = _state_version
+    _download_changed.notify_all()
+
+
+@contextlib.contextmanager
+def _updating(download_id):
+    """Hold _download_lock while mutating a download, then announce the change."""
+    with _download_lock:
+        yield
+        _mark_changed(download_id)
 
 
 def cleanup_old_downloads():
@@ -78,6 +364,8 @@ def cleanup_old_downloads():
         for dl_id in to_remove:
             del ACTIVE_DOWNLOADS[dl_id]
             DOWNLOAD_LOGS.pop(dl_id, None)
+        if to_remove:
+            _mark_changed(None)
     if to_remove:
         logger.info(f"Cleaned up {len(to_remove)} old download(s).")
 
@@ -87,53 +375,558 @@ def _cleanup_loop():
         time.sleep(300)
         try:
             cleanup_old_downloads()
+            cleanup_capture_sessions()
+            JOURNAL.compact()
         except Exception:
             pass
 
 
+# ── Job journal ────────────────────────────────────────────────────────────────
+
+JOURNAL_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "jobs.jsonl")
+
+
+class JobJournal:
+    """Append-only JSONL record of download jobs, replayed after a restart.
+
+    Each line is one event for one job: ``job`` (the /download parameters),
+    ``path`` (the folder picked for it), ``tracks`` (the track list once it
+    is known), ``track`` (one track's outcome, by index) and ``end``.
+    Compaction drops finished jobs but writes a ``seq`` line carrying the
+    highest id ever journaled, so ids are not reused after a restart.
+    Lines are flushed and fsynced as they are written; a half-written last
+    line from a crash is skipped on replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, op, download_id, **fields):
+        record = dict(fields, op=op, id=download_id, t=round(time.time(), 3))
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.warning(f"Could not write job journal: {e}")
+
+    def _replay(self):
+        """Return ({id: job}, highest numeric id seen in any record)."""
+        jobs = {}
+        highest = 0
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except OSError:
+            return jobs, highest
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    op, download_id = record["op"], str(record["id"])
+                    if download_id.isdigit():
+                        highest = max(highest, int(download_id))
+                    if op == "job":
+                        jobs[download_id] = dict(record, outcomes={}, finished=False)
+                        continue
+                    job = jobs.get(download_id)
+                    if job is None:
+                        continue
+                    if op == "path":
+                        job["prepared_path"] = record["path"]
+                    elif op == "tracks":
+                        job["tracks"] = record["tracks"]
+                    elif op == "track":
+                        job["outcomes"][int(record["i"])] = (bool(record["ok"]), record.get("err", ""))
+                    elif op == "end":
+                        job["finished"] = True
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return jobs, highest
+
+    def compact(self):
+        """Drop finished jobs from the journal.
+
+        Returns (jobs, highest_id): every job that was in it, and the highest
+        numeric id ever journaled. Each job is a dict of its /download
+        parameters plus ``tracks``, ``prepared_path``, ``outcomes``
+        ({index: (ok, error)}) and ``finished``.
+        """
+        with self._lock:
+            jobs, highest = self._replay()
+            lines = [{"op": "seq", "id": highest}] if highest else []
+            for download_id, job in jobs.items():
+                if job["finished"]:
+                    continue
+                lines.append({k: v for k, v in job.items() if k not in ("outcomes", "finished", "prepared_path")})
+                if job.get("prepared_path"):
+                    lines.append({"op": "path", "id": download_id, "path": job["prepared_path"]})
+                for i, (ok, err) in sorted(job["outcomes"].items()):
+                    lines.append({"op": "track", "id": download_id, "i": i, "ok": ok, "err": err})
+            tmp = f"{self.path}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for record in lines:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.warning(f"Could not compact job journal: {e}")
+        return jobs, highest
+
+
+JOURNAL = JobJournal(JOURNAL_FILE)
+
+
+def resume_journaled_jobs():
+    """Requeue the jobs a previous run left unfinished, skipping tracks it completed.
+
+    Track outcomes are only journaled by the yt-dlp pipeline, so a job that
+    already has some resumes on yt-dlp rather than restarting under spotdl.
+    """
+    global _download_counter
+    jobs, highest_id = JOURNAL.compact()
+    resumed = [(download_id, job) for download_id, job in jobs.items() if not job["finished"]]
+    with _download_lock:
+        _download_counter = max(_download_counter, highest_id)
+        for download_id, job in resumed:
+            tracks = job.get("tracks") or None
+            outcomes = job["outcomes"]
+            total = len(tracks) if tracks else 0
+            ACTIVE_DOWNLOADS[download_id] = {
+                "url": job["url"], "status": "queued",
+                "done": len(outcomes), "total": total, "error": "",
+                "started_at": job.get("t", time.time()), "engine": job.get("engine", "auto"),
+                "collection": job.get("collection", ""), "priority": job.get("priority", 0),
+                "resumed": True,
+            }
+            DOWNLOAD_LOGS[download_id] = DownloadLog()
+            DOWNLOAD_LOGS[download_id].append(
+                f"Resumed after a restart ({len(outcomes)}/{total} tracks already done)."
+                if total else "Resumed after a restart."
+            )
+            _mark_changed(download_id)
+    for download_id, job in resumed:
+        engine = "ytdlp" if job["outcomes"] else job.get("engine", "auto")
+        resume = {"path": job.get("prepared_path"), "outcomes": job["outcomes"]}
+        SCHEDULER.submit(
+            download_id, job.get("priority", 0), prepare_and_download,
+            (download_id, job["url"], job.get("quality", "320"), job["path"], engine,
+             job.get("tracks") or None, job.get("collection", ""), resume),
+        )
+    if resumed:
+        logger.info(f"Resuming {len(resumed)} unfinished download(s) from the job journal.")
+
+
+# ── Job scheduler ──────────────────────────────────────────────────────────────
+
+PRIORITY_TRACK = 0
+PRIORITY_SMALL_COLLECTION = 5
+PRIORITY_COLLECTION = 10
+SMALL_COLLECTION_SIZE = 25
+_DEFAULT_SECONDS_PER_TRACK = 20.0
+
+
+def default_job_priority(content_type, total):
+    """Lower runs first: single tracks, then short albums, then big playlists."""
+    if content_type == "track":
+        return PRIORITY_TRACK
+    if 0 < total <= SMALL_COLLECTION_SIZE:
+        return PRIORITY_SMALL_COLLECTION
+    return PRIORITY_COLLECTION
+
+
+class ProcessLimiter:
+    """Counting semaphore for child processes whose limit can change at runtime."""
+
+    def __init__(self, limit):
+        self._cond = threading.Condition()
+        self._limit = limit
+        self.active = 0
+
+    def set_limit(self, limit):
+        with self._cond:
+            self._limit = limit
+            self._cond.notify_all()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    def __enter__(self):
+        with self._cond:
+            while self.active >= self._limit:
+                self._cond.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class JobScheduler:
+    """Priority/FIFO queue in front of the download workers.
+
+    At most ``max_jobs`` downloads run at once; waiting jobs are ordered by
+    (priority, submission order) so equal-priority jobs stay FIFO.
+    """
+
+    def __init__(self, max_jobs):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._seq = itertools.count()
+        self._running = {}  # download_id -> started_at
+        self._max_jobs = max_jobs
+        self._seconds_per_track = _DEFAULT_SECONDS_PER_TRACK
+
+    def set_max_jobs(self, max_jobs):
+        with self._lock:
+            self._max_jobs = max_jobs
+        self._dispatch()
+
+    def submit(self, download_id, priority, target, args):
+        with self._lock:
+            heapq.heappush(self._heap, (priority, next(self._seq), download_id, target, args))
+        self._dispatch()
+
+    def _dispatch(self):
+        with self._lock:
+            while self._heap and len(self._running) < self._max_jobs:
+                _, _, download_id, target, args = heapq.heappop(self._heap)
+                self._running[download_id] = time.time()
+                threading.Thread(
+                    target=self._run, args=(download_id, target, args),
+                    name=f"job-{download_id}", daemon=True,
+                ).start()
+
+    def _run(self, download_id, target, args):
+        try:
+            target(*args)
+        except Exception as e:
+            logger.error(f"[{download_id}] Download worker crashed: {e}")
+            with _updating(download_id):
+                if download_id in ACTIVE_DOWNLOADS:
+                    ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
+                    ACTIVE_DOWNLOADS[download_id]["error"] = str(e)
+        finally:
+            with _updating(download_id):
+                info = ACTIVE_DOWNLOADS.get(download_id, {})
+                info["finished"] = True
+                tracks = info.get("total", 0)
+                status, error = info.get("status"), info.get("error", "")
+            JOURNAL.append("end", download_id, status=status, error=error)
+            with self._lock:
+                started_at = self._running.pop(download_id, time.time())
+                if tracks > 0:
+                    # Exponential moving average keeps ETAs tracking current throughput.
+                    per_track = (time.time() - started_at) / tracks
+                    self._seconds_per_track = 0.7 * self._seconds_per_track + 0.3 * per_track
+            self._dispatch()
+
+    def position(self, download_id):
+        """1-based queue position, or 0 if the job is not waiting."""
+        return self.positions().get(download_id, 0)
+
+    def positions(self):
+        """{download_id: 1-based queue position} for every waiting job."""
+        with self._lock:
+            ordered = sorted(self._heap)
+        return {entry[2]: index + 1 for index, entry in enumerate(ordered)}
+
+    def snapshot(self):
+        """Return running ids and queued jobs with position and ETA (seconds to start)."""
+        with self._lock:
+            ordered = sorted(self._heap)
+            running = list(self._running)
+            max_jobs = self._max_jobs
+            per_track = self._seconds_per_track
+        with _download_lock:
+            def remaining(download_id):
+                info = ACTIVE_DOWNLOADS.get(download_id, {})
+                return max(info.get("total", 0) - info.get("done", 0), 1)
+
+            backlog = sum(remaining(download_id) for download_id in running)
+            queued = []
+            for index, (priority, _, download_id, _, _) in enumerate(ordered):
+                queued.append({
+                    "id": download_id,
+                    "position": index + 1,
+                    "priority": priority,
+                    "total": ACTIVE_DOWNLOADS.get(download_id, {}).get("total", 0),
+                    "eta_seconds": round(backlog * per_track / max_jobs),
+                })
+                backlog += remaining(download_id)
+        return {
+            "running": running,
+            "queued": queued,
+            "max_concurrent_jobs": max_jobs,
+            "seconds_per_track": round(per_track, 1),
+        }
+
+
+SCHEDULER = JobScheduler(DEFAULT_CONFIG["max_concurrent_jobs"])
+CHILD_PROCESSES = ProcessLimiter(DEFAULT_CONFIG["max_child_processes"])
+
+
+def apply_runtime_limits(config):
+    """Push concurrency settings from *config* into the running scheduler."""
+    SCHEDULER.set_max_jobs(get_config_int(config, "max_concurrent_jobs", MAX_CONCURRENT_JOBS_LIMIT))
+    CHILD_PROCESSES.set_limit(get_config_int(config, "max_child_processes", MAX_CHILD_PROCESSES_LIMIT))
+
+
+CONFIG.subscribe(apply_runtime_limits)
+
+
 # ── Dependency checks (cached) ─────────────────────────────────────────────────
 
-_spotdl_cache = {"installed": None, "checked_at": 0.0}
-_ytdlp_cache = {"installed": None, "checked_at": 0.0}
-_ffmpeg_cache = {"installed": None, "checked_at": 0.0}
-_spotdl_ver_cache = {"ver": None, "checked_at": 0.0}
-_CACHE_TTL = 120
+DEPS_CACHE_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "deps_cache.json")
+_CACHE_TTL = 120  # seconds between background fingerprint checks
+DEPS_MAX_AGE = 24 * 3600  # re-probe even unchanged executables this often
 
 
-def check_spotdl_installed():
-    now = time.time()
-    if _spotdl_cache["installed"] is not None and (now - _spotdl_cache["checked_at"]) < _CACHE_TTL:
-        return _spotdl_cache["installed"]
+def _file_stamp(path):
+    """[path, mtime] identifying one executable or module file; mtime 0 if absent."""
+    if not path:
+        return [None, 0]
+    try:
+        return [path, os.stat(path).st_mtime]
+    except OSError:
+        return [path, 0]
+
+
+def _module_file(name):
+    """Location of top-level module *name* on sys.path, without importing it."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec else None
+
+
+def _spotdl_fingerprint():
+    return [_file_stamp(sys.executable), _file_stamp(_module_file("spotdl"))]
+
+
+def _ytdlp_fingerprint():
+    system_ytdlp = shutil.which("yt-dlp")
+    if system_ytdlp:
+        return _file_stamp(system_ytdlp)
+    return [_file_stamp(sys.executable), _file_stamp(_module_file("yt_dlp"))]
+
+
+def _ffmpeg_fingerprint():
+    return _file_stamp(get_ffmpeg_path())
+
+
+def _probe_spotdl():
+    """Return {"installed": bool, "version": [major, minor, patch]}."""
+    installed, ver = False, [4, 0, 0]
+    try:
+        # A running worker already has spotdl imported; asking it is free.
+        text = SPOTDL_WORKER.version() if SPOTDL_WORKER.is_alive() else None
+        if text:
+            installed = True
+        else:
+            r = subprocess.run(
+                [sys.executable, "-m", "spotdl", "--version"],
+                capture_output=True, text=True, timeout=10
+            )
+            installed = r.returncode == 0
+            text = (r.stdout + r.stderr).strip()
+        m = re.search(r'(\d+)\.(\d+)\.?(\d*)', text) if installed else None
+        if m:
+            ver = [int(m.group(1)), int(m.group(2)), int(m.group(3) or 0)]
+    except Exception:
+        pass
+    if installed:
+        logger.info(f"SpotDL version detected: {ver[0]}.{ver[1]}.{ver[2]}")
+    return {"installed": installed, "version": ver}
+
+
+def _probe_spotdl_help():
+    try:
+        r = subprocess.run(
+            [sys.executable, "-m", "spotdl", "--help"],
+            capture_output=True, text=True, timeout=15
+        )
+        return (r.stdout or "") + (r.stderr or "")
+    except Exception:
+        return ""
+
+
+def _probe_ytdlp():
+    if shutil.which("yt-dlp") is not None:
+        return True
     try:
         result = subprocess.run(
-            [sys.executable, "-m", "spotdl", "--version"],
+            [sys.executable, "-m", "yt_dlp", "--version"],
             capture_output=True, text=True, timeout=10
         )
-        installed = result.returncode == 0
+        return result.returncode == 0
     except Exception:
-        installed = False
-    _spotdl_cache["installed"] = installed
-    _spotdl_cache["checked_at"] = now
-    return installed
+        return False
 
 
-def check_ytdlp_installed():
-    now = time.time()
-    if _ytdlp_cache["installed"] is not None and (now - _ytdlp_cache["checked_at"]) < _CACHE_TTL:
-        return _ytdlp_cache["installed"]
-    installed = shutil.which("yt-dlp") is not None
-    if not installed:
+def _probe_ffmpeg():
+    # The path (not just a flag) so a moved ffmpeg changes DEPENDENCIES.version.
+    return get_ffmpeg_path() or ""
+
+
+class DependencyProbes:
+    """Results of the slow "is X installed / which version" probes.
+
+    Each probe is paired with a fingerprint (executable or module path plus
+    mtime) that is cheap to compute.  Results are persisted to *path* and are
+    only re-probed when the fingerprint changes or the entry is older than
+    DEPS_MAX_AGE, so a restart serves the previous answers immediately.
+    ``refresh`` runs all stale probes concurrently; the server calls it from
+    a background thread so request handlers never launch a probe themselves.
+    Until the first refresh lands, ``get`` returns None and ``pending``
+    reports the probes still outstanding.
+    """
+
+    def __init__(self, path, probes):
+        self.path = path
+        self._probes = probes  # name -> (fingerprint_func, probe_func)
+        self._results = {}  # name -> {"key": fingerprint, "value": ..., "checked_at": t}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.version = 0  # bumped whenever a probed value changes
+        self._load()
+
+    def _load(self):
         try:
-            result = subprocess.run(
-                [sys.executable, "-m", "yt_dlp", "--version"],
-                capture_output=True, text=True, timeout=10
-            )
-            installed = result.returncode == 0
-        except Exception:
-            pass
-    _ytdlp_cache["installed"] = installed
-    _ytdlp_cache["checked_at"] = now
-    return installed
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self._results = {
+                name: entry for name, entry in data.items()
+                if name in self._probes and isinstance(entry, dict) and "value" in entry
+            }
+
+    def _save(self):
+        with self._lock:
+            data = dict(self._results)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write {self.path}: {e}")
+            _remove_quietly(tmp)
+
+    def get(self, name):
+        """Return the last probed value for *name*, or None if it was never probed."""
+        entry = self._results.get(name)
+        return entry["value"] if entry else None
+
+    def pending(self, names=None):
+        """Names among *names* (default: all probes) that have no result yet."""
+        return [name for name in (names or self._probes) if name not in self._results]
+
+    def set(self, name, value):
+        """Record a value learned elsewhere (e.g. right after an install)."""
+        key = self._probes[name][0]()
+        with self._lock:
+            old = self._results.get(name)
+            if old is None or old["value"] != value:
+                self.version += 1
+            self._results[name] = {"key": key, "value": value, "checked_at": time.time()}
+        self._save()
+
+    def refresh(self, names=None, force=False):
+        """Re-probe entries whose fingerprint changed, in parallel. Returns their names."""
+        with self._refresh_lock:
+            importlib.invalidate_caches()  # see packages pip installed since the last look
+            names = list(names or self._probes)
+            now = time.time()
+            keys = {name: self._probes[name][0]() for name in names}
+            stale = []
+            for name in names:
+                entry = self._results.get(name)
+                if (force or entry is None or entry.get("key") != keys[name]
+                        or now - entry.get("checked_at", 0) > DEPS_MAX_AGE):
+                    stale.append(name)
+            if not stale:
+                return []
+            with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+                values = dict(zip(stale, pool.map(lambda n: self._probes[n][1](), stale)))
+            with self._lock:
+                for name in stale:
+                    old = self._results.get(name)
+                    if old is None or old["value"] != values[name]:
+                        self.version += 1
+                    self._results[name] = {"key": keys[name], "value": values[name], "checked_at": now}
+            self._save()
+            return stale
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "checked_at": {name: entry.get("checked_at", 0) for name, entry in self._results.items()},
+            }
+
+
+DEPENDENCIES = DependencyProbes(DEPS_CACHE_FILE, {
+    "spotdl": (_spotdl_fingerprint, _probe_spotdl),
+    "spotdl_help": (_spotdl_fingerprint, _probe_spotdl_help),
+    "ytdlp": (_ytdlp_fingerprint, _probe_ytdlp),
+    "ffmpeg": (_ffmpeg_fingerprint, _probe_ffmpeg),
+})
+
+
+def _dependency_loop(config):
+    """Probe dependencies off the request path, install what is missing, then keep watching."""
+    logger.info("Checking dependencies...")
+    try:
+        DEPENDENCIES.refresh()
+    except Exception as e:
+        logger.warning(f"Dependency probe failed: {e}")
+    spotdl_ok = check_spotdl_installed()
+    ytdlp_ok = check_ytdlp_installed()
+    ffmpeg_ok = check_ffmpeg_installed()
+    logger.info(f"SpotDL : {'OK' if spotdl_ok else 'MISSING'}")
+    logger.info(f"yt-dlp : {'OK' if ytdlp_ok else 'MISSING'}")
+    logger.info(f"FFmpeg : {'OK' if ffmpeg_ok else 'MISSING'} ({get_ffmpeg_path() or 'not found'})")
+    logger.info(f"Engine : {config.get('engine', 'spotdl')}")
+
+    # Auto-install missing deps in background
+    if not spotdl_ok:
+        threading.Thread(target=auto_install_spotdl, daemon=True).start()
+    if not ytdlp_ok:
+        threading.Thread(target=auto_install_ytdlp, daemon=True).start()
+    if not ffmpeg_ok:
+        threading.Thread(target=auto_install_ffmpeg, daemon=True).start()
+
+    while True:
+        time.sleep(_CACHE_TTL)
+        try:
+            DEPENDENCIES.refresh()
+        except Exception as e:
+            logger.warning(f"Dependency probe failed: {e}")
+
+
+def check_spotdl_installed():
+    return bool((DEPENDENCIES.get("spotdl") or {}).get("installed"))
+
+
+def check_ytdlp_installed():
+    return bool(DEPENDENCIES.get("ytdlp"))
 
 
 def get_ytdlp_cmd():
@@ -145,35 +938,12 @@ def get_ytdlp_cmd():
 
 
 def get_spotdl_version():
-    now = time.time()
-    if _spotdl_ver_cache["ver"] is not None and (now - _spotdl_ver_cache["checked_at"]) < _CACHE_TTL:
-        return _spotdl_ver_cache["ver"]
-    ver = (4, 0, 0)
-    try:
-        r = subprocess.run(
-            [sys.executable, "-m", "spotdl", "--version"],
-            capture_output=True, text=True, timeout=10
-        )
-        text = (r.stdout + r.stderr).strip()
-        m = re.search(r'(\d+)\.(\d+)\.?(\d*)', text)
-        if m:
-            ver = (int(m.group(1)), int(m.group(2)), int(m.group(3) or 0))
-    except Exception:
-        pass
-    _spotdl_ver_cache["ver"] = ver
-    _spotdl_ver_cache["checked_at"] = now
-    logger.info(f"SpotDL version detected: {ver[0]}.{ver[1]}.{ver[2]}")
-    return ver
+    ver = (DEPENDENCIES.get("spotdl") or {}).get("version") or (4, 0, 0)
+    return tuple(ver)
 
 
 def check_ffmpeg_installed():
-    now = time.time()
-    if _ffmpeg_cache["installed"] is not None and (now - _ffmpeg_cache["checked_at"]) < _CACHE_TTL:
-        return _ffmpeg_cache["installed"]
-    installed = get_ffmpeg_path() is not None
-    _ffmpeg_cache["installed"] = installed
-    _ffmpeg_cache["checked_at"] = now
-    return installed
+    return bool(DEPENDENCIES.get("ffmpeg"))
 
 
 def get_ffmpeg_path():
@@ -226,7 +996,22 @@ def build_ffmpeg_env():
     return env
 
 
+_install_lock = threading.RLock()
+
+
+def _holding_install_lock(func):
+    """Serialize installers: concurrent pip runs into one environment clobber each other."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _install_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@_holding_install_lock
 def auto_install_spotdl():
+    if check_spotdl_installed():
+        return True  # another request installed it while we waited for the lock
     logger.info("SpotDL not found — installing automatically...")
     try:
         result = subprocess.run(
@@ -235,9 +1020,7 @@ def auto_install_spotdl():
         )
         if result.returncode == 0:
             logger.info("SpotDL installed successfully.")
-            _spotdl_cache["installed"] = True
-            _spotdl_cache["checked_at"] = time.time()
-            _spotdl_ver_cache["ver"] = None
+            DEPENDENCIES.refresh(("spotdl", "spotdl_help"), force=True)
             return True
         else:
             logger.error(f"pip install spotdl failed: {result.stderr[:500]}")
@@ -247,7 +1030,10 @@ def auto_install_spotdl():
         return False
 
 
+@_holding_install_lock
 def auto_install_ytdlp():
+    if check_ytdlp_installed():
+        return True
     logger.info("yt-dlp not found — installing automatically...")
     try:
         result = subprocess.run(
@@ -256,8 +1042,7 @@ def auto_install_ytdlp():
         )
         if result.returncode == 0:
             logger.info("yt-dlp installed successfully.")
-            _ytdlp_cache["installed"] = True
-            _ytdlp_cache["checked_at"] = time.time()
+            DEPENDENCIES.set("ytdlp", True)
             return True
         else:
             logger.error(f"pip install yt-dlp failed: {result.stderr[:500]}")
@@ -267,7 +1052,10 @@ def auto_install_ytdlp():
         return False
 
 
+@_holding_install_lock
 def auto_install_ffmpeg():
+    if get_ffmpeg_path():
+        return True
     logger.info("FFmpeg not found — attempting auto-install...")
     # Method 1: spotdl --download-ffmpeg
     if check_spotdl_installed():
@@ -278,8 +1066,7 @@ def auto_install_ffmpeg():
             )
             if get_ffmpeg_path():
                 logger.info("FFmpeg downloaded via spotdl.")
-                _ffmpeg_cache["installed"] = True
-                _ffmpeg_cache["checked_at"] = time.time()
+                DEPENDENCIES.set("ffmpeg", get_ffmpeg_path() or "")
                 return True
         except Exception as e:
             logger.warning(f"FFmpeg via spotdl: {e}")
@@ -292,8 +1079,7 @@ def auto_install_ffmpeg():
         )
         if pip_result.returncode == 0 and get_ffmpeg_path():
             logger.info("FFmpeg installed via imageio-ffmpeg.")
-            _ffmpeg_cache["installed"] = True
-            _ffmpeg_cache["checked_at"] = time.time()
+            DEPENDENCIES.set("ffmpeg", get_ffmpeg_path() or "")
             return True
     except Exception as e:
         logger.warning(f"Fallback FFmpeg install failed: {e}")
@@ -301,10 +1087,13 @@ def auto_install_ffmpeg():
     return False
 
 
+@_holding_install_lock
 def ensure_dependencies(engine=None):
     """Make sure selected engine + FFmpeg are available. Returns (ok, error_str)."""
     if engine is None:
         engine = load_config().get("engine", "auto")
+    # Runs in a job thread: probe now rather than install over a pending result.
+    DEPENDENCIES.refresh()
 
     if engine == "spotdl":
         if not check_spotdl_installed():
@@ -342,143 +1131,777 @@ def parse_spotify_url(url):
     return None
 
 
-def spotify_url_to_search_query(url):
-    """
-    Convert Spotify URL to a search query using Spotify's oEmbed API (no auth needed).
-    """
-    oembed_url = f"https://open.spotify.com/oembed?url={url}"
-    try:
-        import urllib.request
-        req = urllib.request.Request(oembed_url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            return data.get("title", "")
-    except Exception as e:
-        logger.warning(f"oEmbed lookup failed: {e}")
-        return ""
+SPOTIFY_HOST = "open.spotify.com"
+SPOTIFY_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+SPOTIFY_POOL_SIZE = 4
+SPOTIFY_CACHE_SIZE = 256
+SPOTIFY_CACHE_TTL = 3600
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after *ttl* seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = collections.OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (time.time(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
 
 
-# ── Spotify embed scraper (no API needed) ──────────────────────────────────────
+class _ResponseBody:
+    """Iterator over a decoded (gunzipped) response body.
 
-def scrape_spotify_tracks(url):
-    """
-    Use Spotify's public embed/oEmbed endpoints to get track info.
-    Returns list of dicts: [{name, spotify_url}, ...]
-    No API keys required.
+    A plain generator would not do: ``close()`` on a generator that never
+    started skips its ``finally``, leaking the connection when a caller
+    rejects the response by status alone.  Here the connection is pooled
+    once the body has been read to the end and closed by ``close()`` at any
+    point before that, started or not.
     """
-    parsed = parse_spotify_url(url)
-    if not parsed:
-        return []
 
-    content_type, content_id = parsed
+    def __init__(self, pool, conn, resp, chunk_size=64 * 1024):
+        self._pool = pool
+        self._conn = conn
+        self._resp = resp
+        self._chunk_size = chunk_size
+        self._decoder = None
+        if resp.getheader("Content-Encoding", "") == "gzip":
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
 
-    if content_type == "track":
-        title = spotify_url_to_search_query(url)
-        return [{"name": title or f"track {content_id}", "spotify_url": url}]
+    def __iter__(self):
+        return self
 
-    # For playlists/albums: try embed page to extract track data
-    embed_url = f"https://open.spotify.com/embed/{content_type}/{content_id}"
-    try:
-        import urllib.request
-        req = urllib.request.Request(embed_url, headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        })
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            html = resp.read().decode("utf-8", errors="replace")
-
-        # Try to extract __NEXT_DATA__ JSON
-        m = re.search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.DOTALL)
-        if m:
+    def __next__(self):
+        while self._conn is not None:
             try:
-                next_data = json.loads(m.group(1))
-                # Navigate common JSON structures
-                props = next_data.get("props", {}).get("pageProps", {})
-                state = props.get("state", props)
-
-                items = []
-                for key in ("tracks", "trackList", "items"):
-                    candidate = state.get(key)
-                    if isinstance(candidate, dict):
-                        items = candidate.get("items", [])
-                    elif isinstance(candidate, list):
-                        items = candidate
-                    if items:
-                        break
-
-                if not items and "data" in state:
-                    data = state["data"]
-                    if isinstance(data, dict):
-                        for key in ("tracks", "trackList"):
-                            candidate = data.get(key)
-                            if isinstance(candidate, dict):
-                                items = candidate.get("items", [])
-                            elif isinstance(candidate, list):
-                                items = candidate
-                            if items:
-                                break
-
-                tracks = []
-                for item in items:
-                    track = item.get("track", item) if isinstance(item, dict) else {}
-                    name = track.get("name", "")
-                    artists = ", ".join(a.get("name", "") for a in track.get("artists", []))
-                    track_id = track.get("id", "")
-                    search_q = f"{name} {artists}" if artists else name
-                    if search_q.strip():
-                        tracks.append({
-                            "name": search_q,
-                            "spotify_url": f"https://open.spotify.com/track/{track_id}" if track_id else "",
-                        })
-                if tracks:
-                    return tracks
-            except Exception as e:
-                logger.warning(f"Failed to parse embed JSON: {e}")
+                data = self._resp.read(self._chunk_size)
+                if not data:
+                    tail = self._decoder.flush() if self._decoder is not None else b""
+                    self._done(complete=True)
+                    if tail:
+                        return tail
+                    break
+                if self._decoder is not None:
+                    data = self._decoder.decompress(data)
+            except BaseException:
+                self._done(complete=False)
+                raise
+            if data:
+                return data
+        raise StopIteration
+
+    def _done(self, complete):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if complete and not self._resp.will_close:
+            self._pool._release(conn)
+        else:
+            conn.close()
 
-        # Fallback: try regex patterns on embed HTML
-        track_pattern = re.findall(
-            r'"name"\s*:\s*"([^"]+)"[^}]*?"artists"\s*:\s*\[([^\]]*)\]',
-            html
-        )
-        if track_pattern:
-            tracks = []
-            for name, artists_json in track_pattern:
-                artist_names = re.findall(r'"name"\s*:\s*"([^"]+)"', artists_json)
-                search_q = f"{name} {', '.join(artist_names)}" if artist_names else name
-                tracks.append({"name": search_q, "spotify_url": ""})
-            if tracks:
-                return tracks
+    def close(self):
+        """Drop the rest of the body; the connection is closed, not pooled."""
+        self._done(complete=False)
 
-    except Exception as e:
-        logger.warning(f"Embed scrape failed: {e}")
 
-    # Final fallback: just get the playlist/album title from oEmbed
-    title = spotify_url_to_search_query(url)
-    if title:
-        return [{"name": title, "spotify_url": url}]
+class SpotifyHTTP:
+    """Keep-alive HTTPS connections to open.spotify.com shared by all lookups.
 
-    return []
+    Up to *size* idle connections are kept, so repeated oEmbed / embed
+    requests skip the TCP and TLS handshakes. A request on a reused
+    connection that the server has meanwhile closed is retried once on a
+    fresh one.
+    """
 
+    def __init__(self, host, size):
+        self.host = host
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.reused = 0
+        self.opened = 0
+
+    def _acquire(self, timeout):
+        with self._lock:
+            self.requests += 1
+            if self._idle:
+                self.reused += 1
+                conn = self._idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.opened += 1
+        return http.client.HTTPSConnection(self.host, timeout=timeout), False
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _open(self, path, timeout, redirects=3):
+        """Send GET *path*; returns (conn, resp) with the body still unread."""
+        headers = {
+            "User-Agent": SPOTIFY_USER_AGENT,
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+        }
+        conn, reused = self._acquire(timeout)
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+            with self._lock:
+                self.opened += 1
+            conn = http.client.HTTPSConnection(self.host, timeout=timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+
+        location = resp.getheader("Location", "")
+        if resp.status in (301, 302, 303, 307, 308) and location and redirects > 0:
+            target = urlparse(location)
+            if target.netloc in ("", self.host):
+                for _ in self._body(conn, resp):
+                    pass
+                return self._open(target.path + (f"?{target.query}" if target.query else ""),
+                                  timeout, redirects - 1)
+        return conn, resp
+
+    def _body(self, conn, resp):
+        """Decoded body of *resp*; the connection goes back to the pool once fully read."""
+        return _ResponseBody(self, conn, resp)
+
+    def stream(self, path, timeout=15):
+        """GET *path*; returns (status, iterator of body chunks).
+
+        Stop iterating early (and call ``close()`` on the iterator) to drop
+        the rest of the body; the connection is then closed, not pooled.
+        """
+        conn, resp = self._open(path, timeout)
+        return resp.status, self._body(conn, resp)
+
+    def get(self, path, timeout=15):
+        """GET *path*; returns (status, body bytes). Raises OSError / HTTPException."""
+        status, chunks = self.stream(path, timeout)
+        return status, b"".join(chunks)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "reused": self.reused,
+                "opened": self.opened,
+                "idle": len(self._idle),
+            }
 
-# ── Command builder: spotdl ───────────────────────────────────────────────────
 
-_help_cache = {"text": None, "checked_at": 0.0}
+SPOTIFY_HTTP = SpotifyHTTP(SPOTIFY_HOST, SPOTIFY_POOL_SIZE)
+SPOTIFY_TITLES = TTLCache(SPOTIFY_CACHE_SIZE, SPOTIFY_CACHE_TTL)  # (type, id) -> oEmbed title
+SPOTIFY_TRACKLISTS = TTLCache(SPOTIFY_CACHE_SIZE, SPOTIFY_CACHE_TTL)  # (type, id) -> [track]
 
 
-def _spotdl_help():
-    now = time.time()
-    if _help_cache["text"] is not None and (now - _help_cache["checked_at"]) < _CACHE_TTL:
-        return _help_cache["text"]
-    try:
-        r = subprocess.run(
-            [sys.executable, "-m", "spotdl", "--help"],
-            capture_output=True, text=True, timeout=15
+def spotify_url_to_search_query(url):
+    """
+    Convert Spotify URL to a search query using Spotify's oEmbed API (no auth needed).
+    Titles are cached per (type, id).
+    """
+    parsed = parse_spotify_url(url)
+    if parsed:
+        title = SPOTIFY_TITLES.get(parsed)
+        if title:
+            return title
+        url = f"https://{SPOTIFY_HOST}/{parsed[0]}/{parsed[1]}"
+    try:
+        status, body = SPOTIFY_HTTP.get(f"/oembed?url={quote(url, safe='')}", timeout=10)
+        if status != 200:
+            raise OSError(f"HTTP {status}")
+        title = json.loads(body.decode("utf-8")).get("title", "")
+    except Exception as e:
+        logger.warning(f"oEmbed lookup failed: {e}")
+        return ""
+    if parsed and title:
+        SPOTIFY_TITLES.put(parsed, title)
+    return title
+
+
+# ── Library index ──────────────────────────────────────────────────────────────
+
+LIBRARY_DB_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "library.db")
+LIBRARY_BATCH_SIZE = 500  # rows per transaction when indexing a folder
+
+
+def normalize_title(text):
+    """Fold a track label so "Song - A, B", "Song A, B" and "Song_A_B" all match."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join(re.sub(r"[\W_]+", " ", text).split())
+
+
+def track_spotify_id(track):
+    parsed = parse_spotify_url(track.get("spotify_url") or "")
+    return parsed[1] if parsed and parsed[0] == "track" else None
+
+
+class LibraryIndex:
+    """SQLite map of Spotify track IDs / normalized titles to files on disk.
+
+    Rows remember size and mtime; a lookup re-stats the file and drops the
+    row if it vanished or changed, so a hit always points at a real file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tracks ("
+                " path TEXT PRIMARY KEY, spotify_id TEXT, norm_title TEXT,"
+                " size INTEGER, mtime REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tracks_spotify_id ON tracks (spotify_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tracks_norm_title ON tracks (norm_title)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _is_current(path, size, mtime):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return st.st_size == size and abs(st.st_mtime - mtime) < 1.0
+
+    def lookup(self, spotify_id=None, title=None):
+        """Return the path of an indexed, still-present file for the track, or None."""
+        norm = normalize_title(title) if title else None
+        with self._lock:
+            db = self._db()
+            rows = []
+            if spotify_id:
+                rows = db.execute(
+                    "SELECT path, size, mtime FROM tracks WHERE spotify_id = ?", (spotify_id,)
+                ).fetchall()
+            if not rows and norm:
+                rows = db.execute(
+                    "SELECT path, size, mtime FROM tracks WHERE norm_title = ?", (norm,)
+                ).fetchall()
+            for path, size, mtime in rows:
+                if self._is_current(path, size, mtime):
+                    return path
+                db.execute("DELETE FROM tracks WHERE path = ?", (path,))
+            if rows:
+                db.commit()
+        return None
+
+    def lookup_track(self, track):
+        return self.lookup(track_spotify_id(track), track.get("name"))
+
+    def add(self, path, spotify_id=None, title=None):
+        self.add_many([(path, spotify_id, title)])
+
+    def add_many(self, entries):
+        """Upsert [(path, spotify_id, title), ...] in one transaction. Returns rows written."""
+        rows = []
+        for path, spotify_id, title in entries:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if title is None:
+                title = os.path.splitext(os.path.basename(path))[0]
+            rows.append((os.path.abspath(path), spotify_id, normalize_title(title), st.st_size, st.st_mtime))
+        if not rows:
+            return 0
+        with self._lock:
+            db = self._db()
+            with db:
+                db.executemany(
+                    "INSERT INTO tracks (path, spotify_id, norm_title, size, mtime) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(path) DO UPDATE SET"
+                    " spotify_id = COALESCE(excluded.spotify_id, tracks.spotify_id),"
+                    " norm_title = excluded.norm_title, size = excluded.size, mtime = excluded.mtime",
+                    rows,
+                )
+        return len(rows)
+
+    def index_folder(self, root):
+        """Add every media file under *root*. Returns the number of files indexed."""
+        count = 0
+        batch = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() in MEDIA_EXTS:
+                    batch.append((os.path.join(dirpath, name), None, None))
+            if len(batch) >= LIBRARY_BATCH_SIZE:
+                count += self.add_many(batch)
+                batch = []
+        return count + self.add_many(batch)
+
+    def index_new_files(self, folder, since):
+        """Add media files directly in *folder* modified at or after *since*.
+
+        Used after a spotdl run, which writes into one folder: only the files
+        that job produced are stat'ed into the index, not the whole library.
+        """
+        return self.add_many(
+            (os.path.join(folder, name), None, None)
+            for name in _media_files_modified_since(folder, since)
         )
-        text = (r.stdout or "") + (r.stderr or "")
-    except Exception:
-        text = ""
-    _help_cache["text"] = text
-    _help_cache["checked_at"] = now
-    return text
+
+    def verify(self):
+        """Drop rows whose file is gone; refresh size/mtime of changed files.
+
+        Returns (kept, removed).
+        """
+        with self._lock:
+            db = self._db()
+            rows = db.execute("SELECT path, size, mtime FROM tracks").fetchall()
+            removed = 0
+            for path, size, mtime in rows:
+                if self._is_current(path, size, mtime):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    db.execute("DELETE FROM tracks WHERE path = ?", (path,))
+                    removed += 1
+                    continue
+                db.execute(
+                    "UPDATE tracks SET size = ?, mtime = ? WHERE path = ?",
+                    (st.st_size, st.st_mtime, path),
+                )
+            db.commit()
+        return len(rows) - removed, removed
+
+    def rebuild(self, root):
+        """Verify existing rows, then (re)index every media file under *root*."""
+        kept, removed = self.verify()
+        indexed = self.index_folder(root)
+        logger.info(f"Library index rebuilt: {indexed} files under {root}, {removed} stale rows removed.")
+        return {"indexed": indexed, "removed": removed, "tracks": self.count()}
+
+    def count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+
+def _media_files_modified_since(folder, since):
+    """Names of media files directly in *folder* with mtime >= *since* (1 s slack for coarse clocks)."""
+    found = []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() not in MEDIA_EXTS:
+                    continue
+                try:
+                    if entry.is_file() and entry.stat().st_mtime >= since - 1.0:
+                        found.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return found
+
+
+LIBRARY = LibraryIndex(LIBRARY_DB_FILE)
+LIBRARY_JOB = {"status": "idle", "action": "", "result": None, "error": ""}
+
+
+def run_library_job(action, root=None):
+    """Background body of POST /library/rebuild and /library/verify."""
+    try:
+        if action == "rebuild":
+            result = LIBRARY.rebuild(root)
+        else:
+            kept, removed = LIBRARY.verify()
+            result = {"kept": kept, "removed": removed, "tracks": kept}
+        LIBRARY_JOB.update(status="completed", result=result, error="")
+    except Exception as e:
+        logger.error(f"Library {action} failed: {e}")
+        LIBRARY_JOB.update(status="failed", result=None, error=str(e))
+
+
+# ── Resolution cache ───────────────────────────────────────────────────────────
+
+RESOLUTION_DB_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "resolve_cache.db")
+RESOLUTION_TTL = 30 * 86400
+RESOLUTION_MAX_ENTRIES = 20000
+
+
+def resolution_keys(track, search_query):
+    """Cache keys for a track: its Spotify ID (if known) and the normalized query."""
+    keys = []
+    spotify_id = track_spotify_id(track)
+    if spotify_id:
+        keys.append(f"sp:{spotify_id}")
+    norm = normalize_title(search_query)
+    if norm:
+        keys.append(f"q:{norm}")
+    return keys
+
+
+class ResolutionCache:
+    """SQLite map of track keys to the YouTube video ID a search resolved to.
+
+    A hit lets yt-dlp fetch the watch URL directly instead of running
+    ``ytsearch1:`` again. Entries expire after *ttl* seconds and the least
+    recently used rows are evicted once there are more than *max_entries*.
+    """
+
+    def __init__(self, path, ttl=RESOLUTION_TTL, max_entries=RESOLUTION_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resolutions ("
+                " key TEXT PRIMARY KEY, video_id TEXT NOT NULL,"
+                " created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS resolutions_last_used ON resolutions (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, keys):
+        """Return the cached video ID for the first live key in *keys*, or None."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            for key in keys:
+                row = db.execute(
+                    "SELECT video_id, created_at FROM resolutions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                video_id, created_at = row
+                if now - created_at > self.ttl:
+                    db.execute("DELETE FROM resolutions WHERE key = ?", (key,))
+                    db.commit()
+                    continue
+                db.execute("UPDATE resolutions SET last_used = ? WHERE key = ?", (now, key))
+                db.commit()
+                self.hits += 1
+                return video_id
+            self.misses += 1
+        return None
+
+    def put(self, keys, video_id):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO resolutions (key, video_id, created_at, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                [(key, video_id, now, now) for key in keys],
+            )
+            excess = db.execute("SELECT COUNT(*) FROM resolutions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM resolutions WHERE key IN"
+                    " (SELECT key FROM resolutions ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            db.commit()
+
+    def forget(self, keys):
+        """Drop *keys*, e.g. after the cached video turned out to be unavailable."""
+        with self._lock:
+            db = self._db()
+            db.executemany("DELETE FROM resolutions WHERE key = ?", [(key,) for key in keys])
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db().execute("SELECT COUNT(*) FROM resolutions").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+RESOLUTIONS = ResolutionCache(RESOLUTION_DB_FILE)
+
+
+# ── Spotify embed scraper (no API needed) ──────────────────────────────────────
+
+def scrape_spotify_tracks(url):
+    """
+    Use Spotify's public embed/oEmbed endpoints to get track info.
+    Returns list of dicts: [{name, spotify_url}, ...]
+    No API keys required.
+    """
+    parsed = parse_spotify_url(url)
+    if not parsed:
+        return []
+
+    content_type, content_id = parsed
+
+    if content_type == "track":
+        title = spotify_url_to_search_query(url)
+        return [{"name": title or f"track {content_id}", "spotify_url": url}]
+
+    # For playlists/albums: try embed page to extract track data
+    tracks = SPOTIFY_TRACKLISTS.get(parsed)
+    if tracks is None:
+        tracks = scrape_embed_tracks(content_type, content_id)
+        if tracks:
+            SPOTIFY_TRACKLISTS.put(parsed, tracks)
+    if tracks:
+        return [dict(track) for track in tracks]
+
+    # Final fallback: just get the playlist/album title from oEmbed
+    title = spotify_url_to_search_query(url)
+    if title:
+        return [{"name": title, "spotify_url": url}]
+
+    return []
+
+
+def scrape_embed_tracks(content_type, content_id):
+    """Parse the track list out of a playlist/album embed page; [] on failure."""
+    try:
+        status, chunks = SPOTIFY_HTTP.stream(f"/embed/{content_type}/{content_id}", timeout=15)
+        try:
+            if status != 200:
+                raise OSError(f"HTTP {status}")
+            return parse_embed_html(chunks)
+        finally:
+            chunks.close()
+    except Exception as e:
+        logger.warning(f"Embed scrape failed: {e}")
+    return []
+
+
+_NEXT_DATA_MARKER = b'id="__NEXT_DATA__"'
+_SCRIPT_END = b"</script>"
+_EMBED_TRACK_RE = re.compile(r'"name"\s*:\s*"([^"]+)"[^}]*?"artists"\s*:\s*\[([^\]]*)\]')
+_EMBED_ARTIST_RE = re.compile(r'"name"\s*:\s*"([^"]+)"')
+
+
+class NextDataExtractor:
+    """Pulls the ``__NEXT_DATA__`` <script> payload out of an HTML byte stream.
+
+    feed() chunks as they arrive; it returns True once the payload is
+    complete so the caller can stop reading. Chunks are never concatenated:
+    a marker split across two chunks is found through a window of at most
+    ``len(marker) - 1`` carried bytes, and the payload is appended straight
+    into one bytearray. Until the marker shows up the raw chunks are kept in
+    ``page`` for the regex fallback.
+    """
+
+    def __init__(self):
+        self.state = "marker"  # -> "tag" -> "payload" -> "done"
+        self.page = []
+        self._tail = b""
+        self._payload = bytearray()
+
+    def _find_marker(self, chunk):
+        """Offset in *chunk* just past the marker, or -1; the marker may start in the carried tail."""
+        keep = len(_NEXT_DATA_MARKER) - 1
+        window = self._tail + chunk[:keep]
+        i = window.find(_NEXT_DATA_MARKER)
+        if i >= 0:
+            return i + len(_NEXT_DATA_MARKER) - len(self._tail)
+        i = chunk.find(_NEXT_DATA_MARKER)
+        if i >= 0:
+            return i + len(_NEXT_DATA_MARKER)
+        self._tail = chunk[-keep:] if len(chunk) >= keep else window[-keep:]
+        return -1
+
+    def feed(self, chunk):
+        if self.state == "done":
+            return True
+        start = 0
+        if self.state == "marker":
+            self.page.append(chunk)
+            start = self._find_marker(chunk)
+            if start < 0:
+                return False
+            self.page = []
+            self._tail = b""
+            self.state = "tag"
+        if self.state == "tag":
+            i = chunk.find(b">", start)
+            if i < 0:
+                return False
+            self.state = "payload"
+            start = i + 1
+        buf = self._payload
+        # Only the last few bytes already buffered can begin a split "</script>".
+        scan_from = max(0, len(buf) - (len(_SCRIPT_END) - 1))
+        buf += memoryview(chunk)[start:]
+        i = buf.find(_SCRIPT_END, scan_from)
+        if i < 0:
+            return False
+        del buf[i:]
+        self.state = "done"
+        return True
+
+    def text(self):
+        """Decode the complete script body and release the buffer; None if it was not found."""
+        if self.state != "done":
+            return None
+        text = self._payload.decode("utf-8", errors="replace")
+        self._payload = bytearray()
+        return text
+
+
+def _embed_track_list(state):
+    """Return the raw track item list from the known __NEXT_DATA__ layouts."""
+    holders = [state]
+    data = state.get("data")
+    if isinstance(data, dict):
+        holders.append(data)
+        entity = data.get("entity")
+        if isinstance(entity, dict):
+            holders.append(entity)
+    for holder in holders:
+        for key in ("tracks", "trackList", "items"):
+            candidate = holder.get(key)
+            if isinstance(candidate, dict):
+                candidate = candidate.get("items")
+            if isinstance(candidate, list) and candidate:
+                return candidate
+    return []
+
+
+def _next_data_items(next_data):
+    """The raw track item list of a parsed __NEXT_DATA__ document."""
+    props = next_data.get("props", {}).get("pageProps", {})
+    return _embed_track_list(props.get("state", props))
+
+
+def _embed_tracks(items):
+    """Turn raw embed track items into [{name, spotify_url}]."""
+    tracks = []
+    for item in items:
+        track = item.get("track", item) if isinstance(item, dict) else None
+        if not isinstance(track, dict):
+            continue
+        name = track.get("name") or track.get("title") or ""
+        artists = track.get("artists")
+        if isinstance(artists, list):
+            artists = ", ".join(a.get("name", "") for a in artists if isinstance(a, dict))
+        else:
+            # Newer embed pages carry artists as a preformatted "subtitle".
+            artists = track.get("subtitle") or ""
+        track_id = track.get("id") or ""
+        uri = track.get("uri") or ""
+        if not track_id and uri.startswith("spotify:track:"):
+            track_id = uri.rsplit(":", 1)[1]
+        search_q = f"{name} {artists}" if artists else name
+        if search_q.strip():
+            tracks.append({
+                "name": search_q,
+                "spotify_url": f"https://open.spotify.com/track/{track_id}" if track_id else "",
+            })
+    return tracks
+
+
+def _regex_embed_tracks(text):
+    tracks = []
+    for name, artists_json in _EMBED_TRACK_RE.findall(text):
+        artist_names = _EMBED_ARTIST_RE.findall(artists_json)
+        search_q = f"{name} {', '.join(artist_names)}" if artist_names else name
+        tracks.append({"name": search_q, "spotify_url": ""})
+    return tracks
+
+
+def parse_embed_html(chunks):
+    """Extract tracks from an embed page given as an iterable of byte chunks.
+
+    Reading stops as soon as the __NEXT_DATA__ script is complete. If its
+    JSON has no recognizable track list, the regex fallback runs over that
+    payload only; the whole page is scanned only when there is no payload.
+    Each copy of the payload is released as soon as the next one exists.
+    """
+    extractor = NextDataExtractor()
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    text = extractor.text()
+    if text is None:
+        return _regex_embed_tracks(b"".join(extractor.page).decode("utf-8", errors="replace"))
+    try:
+        items = _next_data_items(json.loads(text))
+    except Exception as e:
+        logger.warning(f"Failed to parse embed JSON: {e}")
+        items = []
+    if not items:
+        return _regex_embed_tracks(text)
+    del text  # the fallback is off the table; free it before building the result
+    return _embed_tracks(items)
+
+
+# ── Command builder: spotdl ───────────────────────────────────────────────────
+
+def _spotdl_help():
+    return DEPENDENCIES.get("spotdl_help") or ""
 
 
 def build_spotdl_cmd(spotify_url, quality, download_path):
@@ -518,12 +1941,36 @@ def build_spotdl_cmd(spotify_url, quality, download_path):
 
 # ── Command builder: yt-dlp ──────────────────────────────────────────────────
 
-def build_ytdlp_cmd(search_query, quality, download_path, filename=None):
-    """Build yt-dlp command to search YouTube and download audio."""
+YTDLP_AUDIO_QUALITY = {"128": "128K", "160": "160K", "320": "320K"}
+
+
+def _ytdlp_safe_name(filename):
+    return re.sub(r'[\\/:*?"<>|]', '_', filename)
+
+
+def _ytdlp_out_template(download_path, filename=None):
+    if filename:
+        return os.path.join(download_path, f"{_ytdlp_safe_name(filename)}.%(ext)s")
+    return os.path.join(download_path, "%(title)s.%(ext)s")
+
+
+def ytdlp_target(search_query, video_id=None):
+    """The watch URL of an already-resolved video, otherwise a YouTube search."""
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return f"ytsearch1:{search_query}"
+
+
+def build_ytdlp_cmd(search_query, quality, download_path, filename=None, video_id=None,
+                    transcode=True):
+    """Build yt-dlp command to search YouTube (or fetch *video_id*) and download audio.
+
+    With *transcode* False the best audio stream is kept as-is (only tagged),
+    leaving MP3 conversion to a separate transcode step.
+    """
     cmd = get_ytdlp_cmd()
 
-    # Search YouTube for the query
-    cmd.append(f"ytsearch1:{search_query}")
+    cmd.append(ytdlp_target(search_query, video_id))
 
     ffmpeg_path = get_ffmpeg_path()
     can_postprocess = bool(ffmpeg_path)  # ffprobe not required; ffmpeg alone handles conversion
@@ -532,18 +1979,11 @@ def build_ytdlp_cmd(search_query, quality, download_path, filename=None):
     cmd.extend(["-f", "bestaudio/best"])
 
     # Convert to MP3 when ffmpeg is available (ffprobe is NOT required for conversion).
-    if can_postprocess:
+    if can_postprocess and transcode:
         cmd.extend(["-x", "--audio-format", "mp3"])
-        cmd.extend(["--audio-quality", {"128": "128K", "160": "160K", "320": "320K"}.get(quality, "320K")])
-
-    # Output template
-    if filename:
-        safe_name = re.sub(r'[\\/:*?"<>|]', '_', filename)
-        out_path = os.path.join(download_path, f"{safe_name}.%(ext)s")
-    else:
-        out_path = os.path.join(download_path, "%(title)s.%(ext)s")
+        cmd.extend(["--audio-quality", YTDLP_AUDIO_QUALITY.get(quality, "320K")])
 
-    cmd.extend(["-o", out_path])
+    cmd.extend(["-o", _ytdlp_out_template(download_path, filename)])
     cmd.append("--no-playlist")
     if can_postprocess:
         cmd.append("--add-metadata")
@@ -559,46 +1999,603 @@ def build_ytdlp_cmd(search_query, quality, download_path, filename=None):
     return cmd
 
 
+def build_ytdlp_resolve_cmd():
+    """yt-dlp command that reads ytsearch1: lines from stdin and prints "query<TAB>video id"."""
+    return get_ytdlp_cmd() + [
+        "--flat-playlist",
+        "--ignore-errors",
+        "--no-warnings",
+        "--print", "%(playlist_id)s\t%(id)s",
+        "--batch-file", "-",
+    ]
+
+
+def build_ytdlp_options(quality, transcode=True):
+    """Build YoutubeDL params equivalent to build_ytdlp_cmd, minus the per-track bits."""
+    ffmpeg_path = get_ffmpeg_path()
+    params = {
+        "format": "bestaudio/best",
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": False,
+        "noprogress": True,
+    }
+    if ffmpeg_path:
+        params["ffmpeg_location"] = os.path.dirname(os.path.abspath(ffmpeg_path))
+        params["postprocessors"] = [{"key": "FFmpegMetadata", "add_metadata": True}]
+        if transcode:
+            params["postprocessors"].insert(0, {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": YTDLP_AUDIO_QUALITY.get(quality, "320K").rstrip("K"),
+            })
+    else:
+        logger.warning("FFmpeg not found; yt-dlp will download in original audio format without MP3 conversion")
+    return params
+
+
+# ── Embedded yt-dlp engine ───────────────────────────────────────────────────
+
+_yt_dlp_module = {"module": None, "checked": False}
+_embedded_idle = collections.defaultdict(list)
+_embedded_lock = threading.Lock()
+
+
+def import_yt_dlp():
+    """Return the yt_dlp module, or None if it cannot be imported."""
+    if not _yt_dlp_module["checked"]:
+        try:
+            import yt_dlp
+            _yt_dlp_module["module"] = yt_dlp
+        except Exception as e:
+            logger.warning(f"yt_dlp module not importable, using subprocess mode: {e}")
+        _yt_dlp_module["checked"] = True
+    return _yt_dlp_module["module"]
+
+
+def get_ytdlp_mode(config=None):
+    """Return "embedded" only when configured *and* the yt_dlp module is importable."""
+    if config is None:
+        config = load_config()
+    if config.get("ytdlp_mode") == "embedded" and import_yt_dlp() is not None:
+        return "embedded"
+    return "subprocess"
+
+
+class _YtdlpLogger:
+    """Routes YoutubeDL messages to our logger and remembers errors for reporting."""
+
+    def __init__(self):
+        self.errors = []
+
+    def debug(self, msg):
+        if not msg.startswith("[debug] "):
+            logger.info(f"[yt-dlp] {msg}")
+
+    def info(self, msg):
+        logger.info(f"[yt-dlp] {msg}")
+
+    def warning(self, msg):
+        logger.warning(f"[yt-dlp] {msg}")
+
+    def error(self, msg):
+        self.errors.append(msg)
+        logger.error(f"[yt-dlp] {msg}")
+
+
+class EmbeddedYtdlp:
+    """A long-lived YoutubeDL instance reused across track downloads.
+
+    Keeping the instance alive means extractors are imported once and the
+    HTTP connection pool is shared by every track the worker downloads.
+    """
+
+    def __init__(self, quality, transcode=True):
+        yt_dlp = import_yt_dlp()
+        self.key = (quality, transcode)
+        self.on_progress = None
+        self.video_id = None
+        self.log = _YtdlpLogger()
+        params = build_ytdlp_options(quality, transcode)
+        params["logger"] = self.log
+        params["progress_hooks"] = [self._progress_hook]
+        self.ydl = yt_dlp.YoutubeDL(params)
+        self.download_error = yt_dlp.utils.DownloadError
+
+    def _progress_hook(self, d):
+        if self.video_id is None:
+            self.video_id = (d.get("info_dict") or {}).get("id")
+        callback = self.on_progress
+        if callback is None:
+            return
+        if d.get("status") == "downloading":
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            if total:
+                callback(min(100.0, d.get("downloaded_bytes", 0) * 100.0 / total))
+        elif d.get("status") == "finished":
+            callback(100.0)
+
+    def download(self, target, out_template, on_progress=None):
+        """Download *target* (URL or ytsearch query). Returns (success, error_msg).
+
+        Afterwards ``self.video_id`` holds the ID of the video that was fetched.
+        """
+        outtmpl = self.ydl.params.get("outtmpl")
+        if isinstance(outtmpl, dict):
+            outtmpl["default"] = out_template
+        else:
+            self.ydl.params["outtmpl"] = out_template
+        self.on_progress = on_progress
+        self.video_id = None
+        self.log.errors = []
+        try:
+            retcode = self.ydl.download([target])
+        except self.download_error as e:
+            return False, str(e)
+        except Exception as e:
+            return False, str(e)
+        finally:
+            self.on_progress = None
+        if retcode == 0:
+            return True, ""
+        return False, self.log.errors[-1] if self.log.errors else f"yt-dlp returned {retcode}"
+
+
+def acquire_embedded_ytdlp(quality, transcode=True):
+    with _embedded_lock:
+        idle = _embedded_idle[(quality, transcode)]
+        if idle:
+            return idle.pop()
+    return EmbeddedYtdlp(quality, transcode)
+
+
+def release_embedded_ytdlp(instance):
+    with _embedded_lock:
+        idle = _embedded_idle[instance.key]
+        if len(idle) < MAX_PARALLEL_TRACKS_LIMIT:
+            idle.append(instance)
+
+
+def download_single_embedded(search_query, quality, download_path, filename=None, on_progress=None,
+                             video_id=None, on_resolved=None, transcode=True):
+    """Embedded counterpart of download_single_ytdlp. Returns (success, error_msg)."""
+    stem = _ytdlp_safe_name(filename) if filename else None
+    before_files = _list_media_files(download_path, stem)
+    try:
+        instance = acquire_embedded_ytdlp(quality, transcode)
+    except Exception as e:
+        return False, f"Could not start embedded yt-dlp: {e}"
+    try:
+        success, err = instance.download(
+            ytdlp_target(search_query, video_id),
+            _ytdlp_out_template(download_path, filename),
+            on_progress,
+        )
+        resolved_id = instance.video_id
+    finally:
+        release_embedded_ytdlp(instance)
+
+    if resolved_id and on_resolved is not None:
+        on_resolved(resolved_id)
+
+    if not success and _list_media_files(download_path, stem) - before_files:
+        logger.warning(f"yt-dlp reported an error but media file was created: {err}")
+        return True, ""
+    return success, err
+
+
 # ── Output parser: spotdl ─────────────────────────────────────────────────────
 
-def parse_spotdl_line(line, download_id):
-    m_total = re.search(r'(?:Found|Loaded)\s+(\d+)\s+(?:songs?|tracks?)', line, re.IGNORECASE)
-    if m_total:
-        with _download_lock:
-            if int(m_total.group(1)) > ACTIVE_DOWNLOADS[download_id]["total"]:
-                ACTIVE_DOWNLOADS[download_id]["total"] = int(m_total.group(1))
+SPOTDL_FLUSH_LINES = 64
+SPOTDL_FLUSH_SECONDS = 0.25
+
+_SPOTDL_TOTAL_RE = re.compile(r'(?:found|loaded)\s+(\d+)\s+(?:songs?|tracks?)')
+_SPOTDL_PAIR_RE = re.compile(r'(\d+)\s*/\s*(\d+)')
+_SPOTDL_PROGRESS_WORDS = ("Downloaded", "Downloading", "Skipping", "Processing", "Searching")
+_SPOTDL_OUTCOME_WORDS = ("downloaded", "skipping", "failed", "error")
+_SPOTDL_OUTCOME_RE = re.compile(r'\s*(?:downloaded|skipping|failed|error)\b')
+_SPOTDL_RATE_LIMIT_PHRASES = ("rate/request limit", "retry will occur after", "too many requests")
+
+
+def classify_spotdl_line(line):
+    """Classify one spotdl output line.
+
+    Each precompiled pattern only runs when a cheap substring check says it
+    can match, so most lines cost one lower() and a few ``in`` tests.
+    Returns (update, rate_limited) where *update* is ("total", n),
+    ("progress", done, total), ("finished",) or None.
+    """
+    low = line.lower()
+    rate_limited = any(phrase in low for phrase in _SPOTDL_RATE_LIMIT_PHRASES)
+
+    if "found" in low or "loaded" in low:
+        m = _SPOTDL_TOTAL_RE.search(low)
+        if m:
+            return ("total", int(m.group(1))), rate_limited
+
+    if "/" in line and any(word in line for word in _SPOTDL_PROGRESS_WORDS):
+        m = _SPOTDL_PAIR_RE.search(line)
+        if m:
+            return ("progress", int(m.group(1)), int(m.group(2))), rate_limited
+
+    if low.lstrip().startswith(_SPOTDL_OUTCOME_WORDS) and _SPOTDL_OUTCOME_RE.match(low):
+        return ("finished",), rate_limited
+    return None, rate_limited
+
+
+class SpotdlOutputParser:
+    """Feeds spotdl output into a job's progress and log, in batches.
+
+    feed() classifies a line and buffers it; flush() applies everything
+    buffered under a single _download_lock acquisition. A flush happens
+    every SPOTDL_FLUSH_LINES lines, SPOTDL_FLUSH_SECONDS after the first
+    buffered line, and when the caller is done.
+    """
+
+    def __init__(self, download_id):
+        self.download_id = download_id
+        self._lock = threading.Lock()
+        self._lines = []
+        self._updates = []
+        self._timer = None
+
+    def feed(self, line):
+        """Buffer *line*; returns True if it reports a spotdl rate limit."""
+        update, rate_limited = classify_spotdl_line(line)
+        with self._lock:
+            self._lines.append(line)
+            if update is not None:
+                self._updates.append(update)
+            if len(self._lines) < SPOTDL_FLUSH_LINES:
+                if self._timer is None:
+                    self._timer = threading.Timer(SPOTDL_FLUSH_SECONDS, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return rate_limited
+        self.flush()
+        return rate_limited
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._lines:
+                return
+            lines, self._lines = self._lines, []
+            updates, self._updates = self._updates, []
+            with _updating(self.download_id):
+                log = DOWNLOAD_LOGS.get(self.download_id)
+                if log is not None:
+                    for line in lines:
+                        log.append(line)
+                info = ACTIVE_DOWNLOADS[self.download_id]
+                for update in updates:
+                    if update[0] == "total":
+                        info["total"] = max(info["total"], update[1])
+                    elif update[0] == "progress":
+                        info["done"] = max(info["done"], update[1])
+                        info["total"] = max(info["total"], update[2])
+                    else:
+                        info["done"] += 1
+
+
+# ── Persistent spotdl worker ──────────────────────────────────────────────────
+
+_SPOTDL_RATE_LIMIT_RE = re.compile(
+    r'rate/request limit|retry will occur after|too many requests', re.IGNORECASE
+)
+
+
+def is_spotdl_rate_limited(text):
+    return _SPOTDL_RATE_LIMIT_RE.search(text) is not None
+
+
+def get_spotdl_mode(config=None):
+    if config is None:
+        config = load_config()
+    return "worker" if config.get("spotdl_mode") == "worker" else "subprocess"
+
+
+def _spotdl_worker_main(conn, ffmpeg_path):
+    """Entry point of the persistent spotdl process.
+
+    Receives job dicts over *conn* and answers with structured events:
+    ``total``, ``song``, ``log`` and finally ``done`` for each job.  The
+    Spotdl client (and its Spotify authentication) is created once and reused.
+    """
+    try:
+        from spotdl import Spotdl
+        from spotdl._version import __version__ as spotdl_version
+        from spotdl.utils import config as spotdl_config
+    except Exception as e:
+        conn.send({"event": "fatal", "error": f"spotdl import failed: {e}"})
+        return
+    if not spotdl_version.split(".")[0].isdigit() or int(spotdl_version.split(".")[0]) < 4:
+        conn.send({"event": "fatal", "error": f"worker mode needs spotdl v4+, found {spotdl_version}"})
         return
+    conn.send({"event": "ready", "version": spotdl_version})
 
-    if any(kw in line for kw in ("Downloaded", "Downloading", "Skipping", "Processing", "Searching")):
-        m_of = re.search(r'(\d+)\s*/\s*(\d+)', line)
-        if m_of:
-            done_val = int(m_of.group(1))
-            total_val = int(m_of.group(2))
-            with _download_lock:
-                if done_val > ACTIVE_DOWNLOADS[download_id]["done"]:
-                    ACTIVE_DOWNLOADS[download_id]["done"] = done_val
-                if total_val > ACTIVE_DOWNLOADS[download_id]["total"]:
-                    ACTIVE_DOWNLOADS[download_id]["total"] = total_val
+    spotify_options = getattr(spotdl_config, "SPOTIFY_OPTIONS", None) or getattr(spotdl_config, "DEFAULT_CONFIG", {})
+    client = None
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
             return
 
-    if re.match(r'\s*(Downloaded|Skipping|Failed|Error)\b', line, re.IGNORECASE):
-        with _download_lock:
-            ACTIVE_DOWNLOADS[download_id]["done"] += 1
+        op = msg.get("op")
+        if op == "stop":
+            return
+        if op != "download":
+            continue
+
+        settings = {
+            "output": msg["output"],
+            "bitrate": msg["bitrate"],
+            "overwrite": "skip",
+            "simple_tui": True,
+            "log_level": "ERROR",
+        }
+        if ffmpeg_path:
+            settings["ffmpeg"] = ffmpeg_path
+        try:
+            if client is None:
+                client = Spotdl(
+                    client_id=spotify_options.get("client_id"),
+                    client_secret=spotify_options.get("client_secret"),
+                    downloader_settings=settings,
+                )
+            else:
+                client.downloader.settings.update(settings)
+            downloader = client.downloader
+
+            conn.send({"event": "log", "line": f"Resolving {msg['url']}"})
+            songs = client.search([msg["url"]])
+            conn.send({"event": "total", "total": len(songs)})
+            if not songs:
+                conn.send({"event": "done", "ok": False, "error": "spotdl found no songs for this URL."})
+                continue
+
+            def _run(song):
+                errors_before = len(getattr(downloader, "errors", []))
+                try:
+                    _, path = downloader.search_and_download(song)
+                except Exception as e:
+                    return song, False, str(e), None
+                if path is not None:
+                    return song, True, "", str(path)
+                new_errors = [
+                    err for err in getattr(downloader, "errors", [])[errors_before:]
+                    if song.name in err
+                ]
+                # No path and no error means spotdl skipped an existing file.
+                return song, not new_errors, new_errors[-1] if new_errors else "", None
+
+            threads = max(1, int(downloader.settings.get("threads") or 4))
+            failed = 0
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for future in as_completed([pool.submit(_run, song) for song in songs]):
+                    song, ok, error, path = future.result()
+                    failed += 0 if ok else 1
+                    conn.send({
+                        "event": "song",
+                        "name": getattr(song, "display_name", song.name),
+                        "url": getattr(song, "url", ""),
+                        "spotify_id": getattr(song, "song_id", None),
+                        "path": path,
+                        "ok": ok,
+                        "error": error,
+                    })
+            conn.send({
+                "event": "done",
+                "ok": failed < len(songs),
+                "error": f"{failed}/{len(songs)} songs failed." if failed else "",
+            })
+        except Exception as e:
+            conn.send({"event": "done", "ok": False, "error": str(e)})
+
+
+class SpotdlWorker:
+    """Parent-side handle for the persistent spotdl worker process.
+
+    Jobs run one at a time; the global job limits decide how many spotdl
+    jobs may wait here.  If the worker cannot import spotdl it is marked
+    unavailable for _CACHE_TTL seconds and callers fall back to subprocesses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc = None
+        self._conn = None
+        self._version = None
+        self._broken_at = 0.0
+
+    def is_alive(self):
+        return self._proc is not None and self._proc.is_alive()
+
+    def available(self):
+        return time.time() - self._broken_at >= _CACHE_TTL
+
+    def _start(self):
+        if self.is_alive():
+            return
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(
+            target=_spotdl_worker_main,
+            args=(child_conn, get_ffmpeg_path()),
+            name="spotdl-worker",
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        self._proc, self._conn = proc, parent_conn
+        msg = self._recv()
+        if not msg or msg.get("event") != "ready":
+            raise RuntimeError((msg or {}).get("error") or "spotdl worker exited during startup")
+        self._version = msg["version"]
+        logger.info(f"spotdl worker started (pid {proc.pid}, spotdl {self._version}).")
+
+    def stop(self):
+        with self._lock:
+            self._stop_locked()
+
+    def _stop_locked(self):
+        if self._conn is not None:
+            try:
+                self._conn.send({"op": "stop"})
+            except Exception:
+                pass
+            self._conn.close()
+        if self._proc is not None:
+            self._proc.join(timeout=5)
+            if self._proc.is_alive():
+                self._proc.kill()
+        self._proc = self._conn = self._version = None
+
+    def _recv(self):
+        """Wait for the next event; returns None if the worker died."""
+        while True:
+            if self._conn.poll(1.0):
+                try:
+                    return self._conn.recv()
+                except (EOFError, OSError):
+                    return None
+            if not self._proc.is_alive():
+                return None
+
+    def version(self):
+        """spotdl version reported by the running worker, without blocking on jobs."""
+        return self._version if self.is_alive() else None
+
+    def run(self, job, on_event):
+        """Send *job* to the worker and feed its events to *on_event*.
+
+        Returns the final ``done`` event, or None if the worker is unusable.
+        A CHILD_PROCESSES slot is taken only once this job owns the worker,
+        so jobs queued behind it do not hold slots while they wait.
+        """
+        with self._lock, CHILD_PROCESSES:
+            try:
+                self._start()
+                self._conn.send(dict(job, op="download"))
+            except Exception as e:
+                logger.error(f"spotdl worker could not be started: {e}")
+                self._stop_locked()
+                self._broken_at = time.time()
+                return None
+            while True:
+                msg = self._recv()
+                if msg is None:
+                    self._stop_locked()
+                    return {"event": "done", "ok": False, "error": "spotdl worker exited unexpectedly."}
+                if msg.get("event") == "done":
+                    return msg
+                on_event(msg)
+
+
+SPOTDL_WORKER = SpotdlWorker()
+
+
+def download_with_spotdl_worker(download_id, spotify_url, quality, download_path):
+    """Run a spotdl job on the persistent worker.
+
+    Returns True/False like download_with_spotdl, or None when the worker is
+    unavailable and the caller should use the subprocess path instead.
+    """
+    if not SPOTDL_WORKER.available():
+        return None
+
+    logger.info(f"[{download_id}] Starting spotdl worker download: {spotify_url}")
+    with _updating(download_id):
+        ACTIVE_DOWNLOADS[download_id]["status"] = "downloading"
+        DOWNLOAD_LOGS.setdefault(download_id, DownloadLog())
+
+    os.makedirs(download_path, exist_ok=True)
+    failed_tracks = []
+    downloaded = []  # (path, spotify_id) for the library index
+
+    def _on_event(event):
+        kind = event.get("event")
+        with _updating(download_id):
+            info = ACTIVE_DOWNLOADS[download_id]
+            logs = DOWNLOAD_LOGS.get(download_id)
+            if kind == "total":
+                info["total"] = max(info.get("total", 0), event["total"])
+                if logs is not None:
+                    logs.append(f"Found {event['total']} songs")
+            elif kind == "song":
+                info["done"] = info.get("done", 0) + 1
+                if event["ok"]:
+                    line = f"Downloaded \"{event['name']}\""
+                    if event.get("path"):
+                        downloaded.append((event["path"], event.get("spotify_id")))
+                else:
+                    line = f"Failed: {event['name']}: {event['error']}"
+                    failed_tracks.append({"name": event["name"], "spotify_url": event.get("url", "")})
+                if logs is not None:
+                    logs.append(line)
+            elif kind == "log" and logs is not None:
+                logs.append(event["line"])
+
+    done = SPOTDL_WORKER.run({
+        "url": spotify_url,
+        "output": os.path.join(download_path, "{title} - {artists}.{output-ext}"),
+        "bitrate": f"{quality}k",
+    }, _on_event)
+    if done is None:
+        with _updating(download_id):
+            ACTIVE_DOWNLOADS[download_id]["done"] = 0
+            if download_id in DOWNLOAD_LOGS:
+                DOWNLOAD_LOGS[download_id].append("spotdl worker unavailable; using subprocess")
+        return None
+
+    LIBRARY.add_many((path, spotify_id, None) for path, spotify_id in downloaded)
+
+    error = done.get("error", "")
+    with _updating(download_id):
+        info = ACTIVE_DOWNLOADS[download_id]
+        info["failed_tracks"] = failed_tracks
+        if done.get("ok"):
+            info["status"] = "completed"
+            info["error"] = error
+        else:
+            info["status"] = "failed"
+            info["error"] = (
+                "spotdl hit a temporary rate limit; falling back to yt-dlp."
+                if is_spotdl_rate_limited(error) else error
+            )
+        if download_id in DOWNLOAD_LOGS and error:
+            DOWNLOAD_LOGS[download_id].append(error)
+
+    if done.get("ok"):
+        logger.info(f"[{download_id}] spotdl worker download completed.")
+    else:
+        logger.error(f"[{download_id}] spotdl worker failed: {error}")
+    return bool(done.get("ok"))
 
 
 # ── Download worker: spotdl ───────────────────────────────────────────────────
 
 def download_with_spotdl(download_id, spotify_url, quality, download_path):
-    """Run spotdl as subprocess. No API keys required."""
+    """Run spotdl (persistent worker or subprocess). No API keys required."""
+    if get_spotdl_mode() == "worker":
+        result = download_with_spotdl_worker(download_id, spotify_url, quality, download_path)
+        if result is not None:
+            return result
+
     logger.info(f"[{download_id}] Starting spotdl download: {spotify_url}")
 
-    with _download_lock:
+    with _updating(download_id):
         ACTIVE_DOWNLOADS[download_id]["status"] = "downloading"
-        DOWNLOAD_LOGS[download_id] = collections.deque(maxlen=200)
+        DOWNLOAD_LOGS.setdefault(download_id, DownloadLog())
 
     os.makedirs(download_path, exist_ok=True)
     cmd = build_spotdl_cmd(spotify_url, quality, download_path)
     env = build_ffmpeg_env()
+    started_at = time.time()
 
     try:
         extra = {}
@@ -607,57 +2604,56 @@ def download_with_spotdl(download_id, spotify_url, quality, download_path):
 
         rate_limited = False
 
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            stdin=subprocess.DEVNULL,
-            text=True,
-            bufsize=1,
-            encoding="utf-8",
-            errors="replace",
-            cwd=download_path,
-            env=env,
-            **extra,
-        )
+        with CHILD_PROCESSES:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+                encoding="utf-8",
+                errors="replace",
+                cwd=download_path,
+                env=env,
+                **extra,
+            )
 
-        for line in proc.stdout:
-            line = line.rstrip()
-            if not line:
-                continue
-            logger.info(f"[spotdl] {line}")
-            lower = line.lower()
-            with _download_lock:
-                if download_id in DOWNLOAD_LOGS:
-                    DOWNLOAD_LOGS[download_id].append(line)
-            parse_spotdl_line(line, download_id)
-
-            if (
-                "rate/request limit" in lower
-                or "retry will occur after" in lower
-                or "too many requests" in lower
-            ):
-                rate_limited = True
-                logger.warning(f"[{download_id}] spotdl rate-limited, switching to fallback engine.")
-                with _download_lock:
-                    if download_id in DOWNLOAD_LOGS:
-                        DOWNLOAD_LOGS[download_id].append("spotdl rate-limited; switching to fallback engine")
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
-                break
+            parser = SpotdlOutputParser(download_id)
+            for line in proc.stdout:
+                line = line.rstrip()
+                if not line:
+                    continue
+                logger.info(f"[spotdl] {line}")
+
+                if parser.feed(line):
+                    rate_limited = True
+                    parser.flush()
+                    logger.warning(f"[{download_id}] spotdl rate-limited, switching to fallback engine.")
+                    with _updating(download_id):
+                        if download_id in DOWNLOAD_LOGS:
+                            DOWNLOAD_LOGS[download_id].append("spotdl rate-limited; switching to fallback engine")
+                    try:
+                        proc.terminate()
+                    except Exception:
+                        pass
+                    break
 
-        proc.wait(timeout=600)
+            parser.flush()
+            proc.wait(timeout=600)
 
         if proc.returncode == 0 and not rate_limited:
-            with _download_lock:
+            with _updating(download_id):
                 total = ACTIVE_DOWNLOADS[download_id].get("total", 0)
                 done = ACTIVE_DOWNLOADS[download_id].get("done", 0)
                 if total > 0 and done < total:
                     ACTIVE_DOWNLOADS[download_id]["done"] = total
                 ACTIVE_DOWNLOADS[download_id]["status"] = "completed"
             logger.info(f"[{download_id}] spotdl download completed.")
+            try:
+                LIBRARY.index_new_files(download_path, started_at)
+            except Exception as e:
+                logger.warning(f"Library index update failed: {e}")
             return True
         else:
             error_message = (
@@ -677,14 +2673,14 @@ def download_with_spotdl(download_id, spotify_url, quality, download_path):
                         continue
                     error_message = c
                     break
-            with _download_lock:
+            with _updating(download_id):
                 ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
                 ACTIVE_DOWNLOADS[download_id]["error"] = error_message
             logger.error(f"[{download_id}] spotdl failed: {error_message}")
             return False
 
     except FileNotFoundError:
-        with _download_lock:
+        with _updating(download_id):
             ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
             ACTIVE_DOWNLOADS[download_id]["error"] = "SpotDL not found. Re-run the installer."
         return False
@@ -693,60 +2689,424 @@ def download_with_spotdl(download_id, spotify_url, quality, download_path):
             proc.kill()
         except Exception:
             pass
-        with _download_lock:
+        with _updating(download_id):
             ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
             ACTIVE_DOWNLOADS[download_id]["error"] = "Download timed out (10 min limit)."
         return False
     except Exception as e:
-        with _download_lock:
+        with _updating(download_id):
             ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
             ACTIVE_DOWNLOADS[download_id]["error"] = str(e)
         return False
 
 
+# ── Transcoding ───────────────────────────────────────────────────────────────
+
+AUDIO_MODES = ("mp3", "passthrough")
+
+# Codecs that passthrough mode keeps as-is: (ffmpeg muxer, file extension,
+# rough bitrate efficiency relative to MP3 — 160 kbps Opus ~ 320 kbps MP3).
+PASSTHROUGH_CODECS = {
+    "opus": ("opus", ".opus", 2.0),
+    "aac": ("ipod", ".m4a", 1.5),
+    "vorbis": ("ogg", ".ogg", 1.5),
+    "mp3": ("mp3", ".mp3", 1.0),
+}
+
+_FFMPEG_AUDIO_RE = re.compile(r'Stream #.*?Audio: (\w+)([^\n]*)')
+_FFMPEG_KBPS_RE = re.compile(r'(\d+) kb/s')
+_FFMPEG_BITRATE_RE = re.compile(r'bitrate: (\d+) kb/s')
+
+
+def get_audio_mode(config=None):
+    """Return the configured audio mode, "mp3" or "passthrough"."""
+    if config is None:
+        config = load_config()
+    mode = config.get("audio_mode")
+    return mode if mode in AUDIO_MODES else DEFAULT_CONFIG["audio_mode"]
+
+
+def _ffmpeg_extra():
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NO_WINDOW}
+    return {}
+
+
+def probe_audio(path):
+    """Return (codec, kbps) of the first audio stream in *path*, or (None, 0)."""
+    ffmpeg_path = get_ffmpeg_path()
+    if not ffmpeg_path:
+        return None, 0
+    try:
+        # Without an output file ffmpeg prints the stream info and exits non-zero.
+        with CHILD_PROCESSES:
+            r = subprocess.run(
+                [ffmpeg_path, "-hide_banner", "-nostdin", "-i", path],
+                capture_output=True, text=True, encoding="utf-8", errors="replace",
+                timeout=30, **_ffmpeg_extra(),
+            )
+    except Exception:
+        return None, 0
+    m = _FFMPEG_AUDIO_RE.search(r.stderr or "")
+    if not m:
+        return None, 0
+    kbps = _FFMPEG_KBPS_RE.search(m.group(2)) or _FFMPEG_BITRATE_RE.search(r.stderr)
+    return m.group(1), int(kbps.group(1)) if kbps else 0
+
+
+def passthrough_format(source, quality):
+    """Return (muxer, ext) if *source* can be kept without re-encoding at *quality*.
+
+    The stream qualifies when its codec is in PASSTHROUGH_CODECS and its
+    bitrate, scaled by the codec's efficiency, reaches ~80% of the target
+    (VBR streams report an average below their nominal rate).
+    """
+    codec, kbps = probe_audio(source)
+    if codec not in PASSTHROUGH_CODECS or not kbps:
+        return None
+    muxer, ext, efficiency = PASSTHROUGH_CODECS[codec]
+    try:
+        target = int(quality)
+    except (TypeError, ValueError):
+        target = int(DEFAULT_CONFIG["quality"])
+    if kbps * efficiency < target * 0.8:
+        return None
+    return muxer, ext
+
+
+def _ffmpeg_to_file(source, dest, codec_args, muxer):
+    """Run ffmpeg from *source* into a temporary file, then rename it to *dest*.
+
+    *source* is removed on success. Returns (success, error_msg).
+    """
+    ffmpeg_path = get_ffmpeg_path()
+    if not ffmpeg_path:
+        return False, "FFmpeg not found."
+    tmp = dest + ".part"
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", source, "-vn", "-map_metadata", "0",
+        *codec_args,
+        "-f", muxer, tmp,
+    ]
+    try:
+        with CHILD_PROCESSES:
+            r = subprocess.run(
+                cmd, capture_output=True, text=True, encoding="utf-8", errors="replace",
+                timeout=600, **_ffmpeg_extra(),
+            )
+    except Exception as e:
+        _remove_quietly(tmp)
+        return False, str(e)
+    if r.returncode != 0:
+        _remove_quietly(tmp)
+        lines = (r.stderr or "").strip().splitlines()
+        return False, lines[-1] if lines else f"ffmpeg exited with code {r.returncode}"
+    os.replace(tmp, dest)
+    _remove_quietly(source)
+    return True, ""
+
+
+def transcode_to_mp3(source, dest, quality):
+    """Encode *source* to an MP3 at *dest* with ffmpeg, keeping its tags.
+
+    Writes to a temporary name and renames on success; *source* is removed
+    afterwards. Returns (success, error_msg).
+    """
+    return _ffmpeg_to_file(source, dest, ["-codec:a", "libmp3lame", "-b:a", f"{quality}k"], "mp3")
+
+
+def remux_audio(source, dest, muxer):
+    """Copy the audio stream of *source* into a *muxer* container at *dest* (no re-encode)."""
+    return _ffmpeg_to_file(source, dest, ["-codec:a", "copy"], muxer)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class TranscodePool:
+    """Server-wide ffmpeg encoder pool shared by every job and /capture-track.
+
+    At most *workers* encodes (the CPU core count) run at once, however many
+    downloads are active; the rest wait in the executor's queue. Queue depth
+    and per-file wait/encode times are kept for /stats.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcode")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.encode_seconds = 0.0
+        self.recent = collections.deque(maxlen=50)
+
+    def submit(self, source, dest, quality, on_done=None):
+        """Queue an encode; returns a Future resolving to (success, error_msg).
+
+        *on_done*, if given, is called with (success, error_msg) from the pool thread.
+        """
+        with self._lock:
+            self.queued += 1
+        return self._executor.submit(self._run, source, dest, quality, time.time(), on_done)
+
+    def transcode(self, source, dest, quality):
+        """Encode in the pool and wait for the result."""
+        return self.submit(source, dest, quality).result()
+
+    def _run(self, source, dest, quality, submitted, on_done):
+        started = time.time()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            success, err = transcode_to_mp3(source, dest, quality)
+        except Exception as e:
+            success, err = False, str(e)
+        elapsed = time.time() - started
+        with self._lock:
+            self.running -= 1
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.encode_seconds += elapsed
+            self.recent.append({
+                "file": os.path.basename(dest),
+                "ok": success,
+                "waited_seconds": round(started - submitted, 2),
+                "encode_seconds": round(elapsed, 2),
+            })
+        if success:
+            logger.info(f"Transcoded {os.path.basename(dest)} in {elapsed:.1f}s")
+        else:
+            logger.warning(f"Transcode of {os.path.basename(source)} failed: {err}")
+        if on_done is not None:
+            on_done(success, err)
+        return success, err
+
+    def stats(self):
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_encode_seconds": round(self.encode_seconds / finished, 2) if finished else 0.0,
+                "recent": list(self.recent),
+            }
+
+
+TRANSCODES = TranscodePool(os.cpu_count() or 1)
+
+
+# ── Track pipeline ────────────────────────────────────────────────────────────
+
+_PIPELINE_STOP = object()
+
+
+class PipelineStage:
+    """One pipeline stage: a bounded input queue drained by *workers* threads."""
+
+    def __init__(self, name, func, workers, queue_size):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.threads = []
+        self.busy = 0
+        self.done = 0
+        self.busy_seconds = 0.0
+
+
+class TrackPipeline:
+    """Streams items through a chain of stages running concurrently.
+
+    Each stage function takes one item and returns a list of items for the
+    next stage (empty when the item is finished or failed). Bounded queues
+    between stages give back-pressure, so a fast stage cannot run far ahead
+    of a slow one, while different stages still overlap: track N+1 can be
+    downloading while track N is being encoded.
+    """
+
+    def __init__(self, name, stages, on_stats=None, on_error=None):
+        self.name = name
+        self.stages = stages
+        self.on_stats = on_stats
+        self.on_error = on_error
+        self.started = None
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """Feed *items* to the first stage and block until every stage drained."""
+        self.started = time.time()
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=self._work, args=(index,), daemon=True,
+                    name=f"{self.name}-{stage.name}-{n}",
+                )
+                t.start()
+                stage.threads.append(t)
+        first = self.stages[0]
+        for item in items:
+            first.queue.put(item)
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(_PIPELINE_STOP)
+            for t in stage.threads:
+                t.join()
+        if self.on_stats is not None:
+            self.on_stats(self.stats())
+
+    def _work(self, index):
+        stage = self.stages[index]
+        following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _PIPELINE_STOP:
+                return
+            with self._lock:
+                stage.busy += 1
+            started = time.time()
+            try:
+                results = stage.func(item) or []
+            except Exception as e:
+                logger.error(f"[{self.name}] {stage.name} stage failed: {e}")
+                results = []
+                if self.on_error is not None:
+                    self.on_error(stage.name, item, e)
+            with self._lock:
+                stage.busy -= 1
+                stage.done += 1
+                stage.busy_seconds += time.time() - started
+            if self.on_stats is not None:
+                self.on_stats(self.stats())
+            if following is not None:
+                for result in results:
+                    following.queue.put(result)
+
+    def stats(self):
+        """Per-stage counters: items done, queued, in flight, and throughput."""
+        elapsed = max(time.time() - (self.started or time.time()), 1e-6)
+        with self._lock:
+            return {
+                stage.name: {
+                    "workers": stage.workers,
+                    "queued": stage.queue.qsize(),
+                    "busy": stage.busy,
+                    "done": stage.done,
+                    "per_minute": round(stage.done * 60.0 / elapsed, 1),
+                    "avg_seconds": round(stage.busy_seconds / stage.done, 2) if stage.done else 0.0,
+                }
+                for stage in self.stages
+            }
+
+
 # ── Download worker: yt-dlp ───────────────────────────────────────────────────
 
-def download_single_ytdlp(search_query, quality, download_path, filename=None):
-    """Download a single track via yt-dlp. Returns (success, error_msg)."""
-    cmd = build_ytdlp_cmd(search_query, quality, download_path, filename)
-    env = build_ffmpeg_env()
-    media_exts = {".mp3", ".m4a", ".webm", ".opus", ".ogg", ".wav", ".flac", ".aac"}
+MEDIA_EXTS = {".mp3", ".m4a", ".webm", ".opus", ".ogg", ".wav", ".flac", ".aac"}
+
 
+def _list_media_files(download_path, stem=None):
+    """Return media file names in *download_path*, optionally only those named *stem*.ext.
+
+    Parallel track downloads share one folder, so callers pass the exact
+    expected stem: "Song 2.webm" or "Song (Remix).mp3" is not output for "Song".
+    """
     try:
-        before_files = {
-            name for name in os.listdir(download_path)
-            if os.path.splitext(name)[1].lower() in media_exts
-        }
+        names = os.listdir(download_path)
     except Exception:
-        before_files = set()
+        return set()
+    found = set()
+    for name in names:
+        base, ext = os.path.splitext(name)
+        if ext.lower() in MEDIA_EXTS and (stem is None or base == stem):
+            found.add(name)
+    return found
+
+
+_YTDLP_PERCENT_RE = re.compile(r'^\[download\]\s+(\d+(?:\.\d+)?)%')
+_YTDLP_VIDEO_ID_RE = re.compile(r'^\[youtube\] ([\w-]{11}): ')
+
+
+def _find_track_file(download_path, filename):
+    """Return the media file yt-dlp wrote for *filename*, or None."""
+    names = _list_media_files(download_path, _ytdlp_safe_name(filename))
+    if not names:
+        return None
+    return max((os.path.join(download_path, name) for name in names), key=os.path.getmtime)
+
+
+def download_single_ytdlp(search_query, quality, download_path, filename=None,
+                          on_progress=None, mode=None, video_id=None, on_resolved=None,
+                          transcode=True):
+    """Download a single track via yt-dlp. Returns (success, error_msg).
+
+    *mode* is "embedded" or "subprocess" (see get_ytdlp_mode); *on_progress*
+    is called with a 0-100 percentage for the current track. With *video_id*
+    the search is skipped; *on_resolved* receives the ID of the fetched video.
+    *transcode* False keeps the source audio stream (see build_ytdlp_cmd).
+    """
+    if (mode or get_ytdlp_mode()) == "embedded":
+        return download_single_embedded(
+            search_query, quality, download_path, filename, on_progress, video_id, on_resolved,
+            transcode,
+        )
+
+    cmd = build_ytdlp_cmd(search_query, quality, download_path, filename, video_id, transcode)
+    env = build_ffmpeg_env()
+    stem = _ytdlp_safe_name(filename) if filename else None
+    before_files = _list_media_files(download_path, stem)
 
     try:
         extra = {}
         if sys.platform == "win32":
             extra["creationflags"] = subprocess.CREATE_NO_WINDOW
 
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            stdin=subprocess.DEVNULL,
-            text=True,
-            bufsize=1,
-            encoding="utf-8",
-            errors="replace",
-            cwd=download_path,
-            env=env,
-            **extra,
-        )
-
-        output_lines = []
-        for line in proc.stdout:
-            line = line.rstrip()
-            if line:
-                output_lines.append(line)
-                logger.info(f"[yt-dlp] {line}")
+        with CHILD_PROCESSES:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+                encoding="utf-8",
+                errors="replace",
+                cwd=download_path,
+                env=env,
+                **extra,
+            )
 
-        proc.wait(timeout=300)
+            output_lines = []
+            resolved_id = None
+            for line in proc.stdout:
+                line = line.rstrip()
+                if line:
+                    output_lines.append(line)
+                    logger.info(f"[yt-dlp] {line}")
+                    if resolved_id is None:
+                        m = _YTDLP_VIDEO_ID_RE.match(line)
+                        if m:
+                            resolved_id = m.group(1)
+                    if on_progress is not None:
+                        m = _YTDLP_PERCENT_RE.match(line)
+                        if m:
+                            on_progress(float(m.group(1)))
+
+            proc.wait(timeout=300)
+
+        if resolved_id and on_resolved is not None:
+            on_resolved(resolved_id)
 
         if proc.returncode == 0:
             return True, ""
@@ -759,13 +3119,7 @@ def download_single_ytdlp(search_query, quality, download_path, filename=None):
                     break
 
             # Some post-processing steps can fail after media was already downloaded.
-            try:
-                after_files = {
-                    name for name in os.listdir(download_path)
-                    if os.path.splitext(name)[1].lower() in media_exts
-                }
-            except Exception:
-                after_files = set()
+            after_files = _list_media_files(download_path, stem)
 
             if len(after_files - before_files) > 0:
                 logger.warning(f"yt-dlp returned non-zero but media file was created: {err}")
@@ -777,27 +3131,115 @@ def download_single_ytdlp(search_query, quality, download_path, filename=None):
         return False, str(e)
 
 
-def download_with_ytdlp(download_id, spotify_url, quality, download_path, tracks=None):
+RESOLVE_BATCH_SIZE = 50
+
+
+def _resolve_batch_subprocess(queries):
+    """Resolve *queries* with one flat yt-dlp run. Returns {normalized query: video id}."""
+    extra = {}
+    if sys.platform == "win32":
+        extra["creationflags"] = subprocess.CREATE_NO_WINDOW
+    try:
+        with CHILD_PROCESSES:
+            r = subprocess.run(
+                build_ytdlp_resolve_cmd(),
+                input="".join(f"ytsearch1:{q}\n" for q in queries),
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=60 + 5 * len(queries),
+                env=build_ffmpeg_env(),
+                **extra,
+            )
+    except Exception as e:
+        logger.warning(f"Batch resolve of {len(queries)} tracks failed: {e}")
+        return {}
+    found = {}
+    for line in r.stdout.splitlines():
+        query, _, video_id = line.rpartition("\t")
+        if query and video_id and video_id != "NA":
+            found.setdefault(normalize_title(query), video_id)
+    return found
+
+
+def _resolve_batch_embedded(queries):
+    """Resolve *queries* through one flat-extracting YoutubeDL instance."""
+    yt_dlp = import_yt_dlp()
+    params = {
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+        "quiet": True,
+        "no_warnings": True,
+        "logger": _YtdlpLogger(),
+    }
+    found = {}
+    with yt_dlp.YoutubeDL(params) as ydl:
+        for query in queries:
+            try:
+                info = ydl.extract_info(f"ytsearch1:{query}", download=False)
+            except Exception as e:
+                logger.warning(f"Could not resolve '{query}': {e}")
+                continue
+            entries = list((info or {}).get("entries") or [])
+            if entries and entries[0].get("id"):
+                found[normalize_title(query)] = entries[0]["id"]
+    return found
+
+
+def resolve_video_ids(queries, mode=None, workers=1):
+    """Resolve many search queries to YouTube video IDs without downloading.
+
+    Queries are split into batches of RESOLVE_BATCH_SIZE, each handled by a
+    single yt-dlp run (or YoutubeDL instance in embedded mode), so a whole
+    playlist pays process start-up and TLS handshakes a handful of times
+    instead of once per track. Returns {normalized query: video id}.
+    """
+    queries = list(dict.fromkeys(q.replace("\n", " ").strip() for q in queries if q.strip()))
+    if not queries:
+        return {}
+    batches = [queries[i:i + RESOLVE_BATCH_SIZE] for i in range(0, len(queries), RESOLVE_BATCH_SIZE)]
+    resolve = _resolve_batch_embedded if (mode or get_ytdlp_mode()) == "embedded" else _resolve_batch_subprocess
+    found = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches))),
+                            thread_name_prefix="ytdlp-resolve") as pool:
+        for result in pool.map(resolve, batches):
+            found.update(result)
+    return found
+
+
+def download_with_ytdlp(download_id, spotify_url, quality, download_path, tracks=None, outcomes=None):
     """
     Download via yt-dlp.  If *tracks* is provided (pre-resolved by the frontend
     via Spicetify.CosmosAsync) it is used directly, skipping all scraping.
+    Tracks listed in *outcomes* ({index: (ok, error)}, from the job journal)
+    are counted as finished and not downloaded again.
+
+    Tracks flow through a TrackPipeline: a resolver stage turns batches of
+    tracks into YouTube video IDs, fetchers download the source audio, and
+    (when ffmpeg is available) transcoders encode it to MP3.
     """
-    logger.info(f"[{download_id}] Starting yt-dlp download: {spotify_url}")
+    config = load_config()
+    mode = get_ytdlp_mode(config)
+    audio_mode = get_audio_mode(config)
+    skip_existing = config.get("skip_existing", True)
+    logger.info(f"[{download_id}] Starting yt-dlp download ({mode}): {spotify_url}")
 
-    with _download_lock:
+    with _updating(download_id):
         ACTIVE_DOWNLOADS[download_id]["status"] = "downloading"
-        DOWNLOAD_LOGS[download_id] = collections.deque(maxlen=500)
+        DOWNLOAD_LOGS.setdefault(download_id, DownloadLog())
 
     os.makedirs(download_path, exist_ok=True)
     parsed = parse_spotify_url(spotify_url)
 
     if not parsed:
-        with _download_lock:
+        with _updating(download_id):
             ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
             ACTIVE_DOWNLOADS[download_id]["error"] = "Invalid Spotify URL."
         return False
 
     content_type, content_id = parsed
+    pre_resolved = bool(tracks)
 
     if content_type == "track":
         # ── Single track ───────────────────────────────────────────────────
@@ -805,121 +3247,307 @@ def download_with_ytdlp(download_id, spotify_url, quality, download_path, tracks
             title = tracks[0]["name"]
         else:
             title = spotify_url_to_search_query(spotify_url) or f"spotify track {content_id}"
+        tracks = [{"name": title, "spotify_url": spotify_url}]
 
-        with _download_lock:
+        with _updating(download_id):
             ACTIVE_DOWNLOADS[download_id]["total"] = 1
             if download_id in DOWNLOAD_LOGS:
                 DOWNLOAD_LOGS[download_id].append(f"Searching YouTube: {title}")
 
-        success, err = download_single_ytdlp(title, quality, download_path, title)
-        with _download_lock:
-            if success:
-                ACTIVE_DOWNLOADS[download_id]["done"] = 1
-                ACTIVE_DOWNLOADS[download_id]["status"] = "completed"
-            else:
-                ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
-                ACTIVE_DOWNLOADS[download_id]["error"] = err
+    elif tracks:
+        # ── Playlist / album, pre-resolved from the Spicetify frontend ────
+        logger.info(f"[{download_id}] Using pre-resolved track list ({len(tracks)} tracks)")
+        with _updating(download_id):
+            ACTIVE_DOWNLOADS[download_id]["total"] = len(tracks)
             if download_id in DOWNLOAD_LOGS:
                 DOWNLOAD_LOGS[download_id].append(
-                    "Completed!" if success else f"Failed: {err}"
+                    f"Track list from Spotify ({len(tracks)} tracks)."
                 )
-        return success
 
     else:
-        # ── Playlist / album ───────────────────────────────────────────────
-        if tracks:
-            # Pre-resolved from the Spicetify frontend — fast & accurate
-            logger.info(f"[{download_id}] Using pre-resolved track list ({len(tracks)} tracks)")
-            with _download_lock:
-                ACTIVE_DOWNLOADS[download_id]["total"] = len(tracks)
-                if download_id in DOWNLOAD_LOGS:
-                    DOWNLOAD_LOGS[download_id].append(
-                        f"Track list from Spotify ({len(tracks)} tracks)."
-                    )
-        else:
-            # Fallback: scrape Spotify embed page
-            with _download_lock:
-                if download_id in DOWNLOAD_LOGS:
-                    DOWNLOAD_LOGS[download_id].append(f"Fetching {content_type} track list...")
+        # ── Playlist / album, scraped from the Spotify embed page ─────────
+        with _updating(download_id):
+            if download_id in DOWNLOAD_LOGS:
+                DOWNLOAD_LOGS[download_id].append(f"Fetching {content_type} track list...")
 
-            tracks = scrape_spotify_tracks(spotify_url)
-            if not tracks:
-                with _download_lock:
-                    ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
-                    ACTIVE_DOWNLOADS[download_id]["error"] = (
-                        f"Could not retrieve the {content_type} track list from Spotify. "
-                        "Try switching to the 'spotdl' engine (Settings page) or "
-                        "download individual tracks instead."
-                    )
-                return False
+        tracks = scrape_spotify_tracks(spotify_url)
+        if not tracks:
+            with _updating(download_id):
+                ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
+                ACTIVE_DOWNLOADS[download_id]["error"] = (
+                    f"Could not retrieve the {content_type} track list from Spotify. "
+                    "Try switching to the 'spotdl' engine (Settings page) or "
+                    "download individual tracks instead."
+                )
+            return False
 
+        with _updating(download_id):
+            ACTIVE_DOWNLOADS[download_id]["total"] = len(tracks)
+            if download_id in DOWNLOAD_LOGS:
+                DOWNLOAD_LOGS[download_id].append(f"Found {len(tracks)} tracks.")
+
+    if not pre_resolved:
+        JOURNAL.append("tracks", download_id, tracks=tracks)
+
+    total = len(tracks)
+    fetchers = min(get_max_parallel_tracks(config), total)
+    transcoders = max(1, min(os.cpu_count() or 1, fetchers))
+    separate_transcode = get_ffmpeg_path() is not None
+    table = TrackTable(tracks, "ytdlp")
+    errors = {}
+    settled = set()
+    finished = 0
+
+    with _updating(download_id):
+        ACTIVE_DOWNLOADS[download_id]["track_table"] = table
+        if download_id in DOWNLOAD_LOGS and fetchers > 1:
+            DOWNLOAD_LOGS[download_id].append(f"Downloading {fetchers} tracks in parallel.")
+
+    def _label(i):
+        return tracks[i].get("name", "") or f"track {i+1}"
+
+    def _progress_for(index):
+        def _update(percent):
             with _download_lock:
-                ACTIVE_DOWNLOADS[download_id]["total"] = len(tracks)
-                if download_id in DOWNLOAD_LOGS:
-                    DOWNLOAD_LOGS[download_id].append(f"Found {len(tracks)} tracks.")
-
-        total = len(tracks)
-        failed_tracks = []  # collect failed ones for capture-mode hint
-        failed_count = 0
-        for i, track in enumerate(tracks):
+                if table.progress(index, int(percent)):
+                    _mark_changed(download_id)
+        return _update
+
+    def _finish(i, success, err="", path=None, skipped=False):
+        """Record the outcome of track *i*; later calls for the same track are ignored."""
+        nonlocal finished
+        track = tracks[i]
+        with _download_lock:
+            if i in settled:
+                return
+            settled.add(i)
+        JOURNAL.append("track", download_id, i=i, ok=success, err=err)
+        if path:
+            LIBRARY.add(path, track_spotify_id(track), track.get("name"))
+        with _updating(download_id):
+            info = ACTIVE_DOWNLOADS[download_id]
+            table.finish(i, success, err, path, skipped)
+            finished += 1
+            info["done"] = finished
+            if not success:
+                errors[i] = err
+                if download_id in DOWNLOAD_LOGS and total > 1:
+                    DOWNLOAD_LOGS[download_id].append(f"  ✗ [{i+1}/{total}] Failed: {_label(i)}: {err}")
+            elif download_id in DOWNLOAD_LOGS and total > 1:
+                DOWNLOAD_LOGS[download_id].append(f"  ✓ [{i+1}/{total}] Done: {_label(i)}")
+
+    def _resolve(batch):
+        """Stage 1: skip tracks already in the library, look up video IDs for the rest."""
+        ready = []
+        pending = {}
+        for i in batch:
+            track = tracks[i]
             search_q = track.get("name", "")
             if not search_q:
-                failed_count += 1
+                _finish(i, False, "Track has no name.")
                 continue
+            if skip_existing:
+                existing = LIBRARY.lookup_track(track)
+                if existing:
+                    with _updating(download_id):
+                        info = ACTIVE_DOWNLOADS[download_id]
+                        info["skipped"] = info.get("skipped", 0) + 1
+                        if download_id in DOWNLOAD_LOGS:
+                            DOWNLOAD_LOGS[download_id].append(f"  ↷ Already in library: {existing}")
+                    _finish(i, True, skipped=True)
+                    continue
+            keys = resolution_keys(track, search_q)
+            video_id = RESOLUTIONS.get(keys)
+            if video_id:
+                ready.append((i, video_id))
+            else:
+                pending[i] = keys
+        if len(pending) > 1:
+            found = resolve_video_ids([tracks[i]["name"] for i in pending], mode)
+            for i, keys in pending.items():
+                video_id = found.get(normalize_title(tracks[i]["name"]))
+                if video_id:
+                    RESOLUTIONS.put(keys, video_id)
+                pending[i] = video_id
+            ready.extend(pending.items())
+        else:
+            # A lone search is cheaper done by the fetcher as part of its download.
+            ready.extend((i, None) for i in pending)
+        return ready
+
+    def _fetch(item):
+        """Stage 2: download the track's audio, searching YouTube if it is unresolved."""
+        i, video_id = item
+        track = tracks[i]
+        search_q = track["name"]
+        filename = f"{search_q}.source" if separate_transcode else search_q
+        with _updating(download_id):
+            table.start(i)
+            if download_id in DOWNLOAD_LOGS and total > 1:
+                DOWNLOAD_LOGS[download_id].append(f"[{i+1}/{total}] {search_q}")
+
+        keys = resolution_keys(track, search_q)
+        resolved = []
+        success, err = download_single_ytdlp(
+            search_q, quality, download_path, filename,
+            on_progress=_progress_for(i), mode=mode,
+            video_id=video_id, on_resolved=resolved.append, transcode=not separate_transcode,
+        )
+        if not success and video_id:
+            # The cached video may have been taken down; search again.
+            RESOLUTIONS.forget(keys)
+            video_id = None
+            with _updating(download_id):
+                table.start(i)
+            success, err = download_single_ytdlp(
+                search_q, quality, download_path, filename,
+                on_progress=_progress_for(i), mode=mode,
+                on_resolved=resolved.append, transcode=not separate_transcode,
+            )
+        if success and resolved and resolved[-1] != video_id:
+            RESOLUTIONS.put(keys, resolved[-1])
+        if not success:
+            _finish(i, False, err)
+            return []
+
+        path = _find_track_file(download_path, filename)
+        if not separate_transcode:
+            _finish(i, True, path=path)
+            return []
+        if not path:
+            _finish(i, False, "Downloaded audio file not found.")
+            return []
+        return [(i, path)]
+
+    def _transcode(item):
+        """Stage 3: encode the downloaded audio to MP3 in the shared transcode pool.
+
+        In passthrough mode a source that already meets the target quality is
+        only remuxed into an audio container, with its tags, and never re-encoded.
+        """
+        i, source = item
+        stem = os.path.join(download_path, _ytdlp_safe_name(tracks[i]["name"]))
+        success = False
+        try:
+            keep = passthrough_format(source, quality) if audio_mode == "passthrough" else None
+            if keep:
+                muxer, ext = keep
+                dest = stem + ext
+                success, err = remux_audio(source, dest, muxer)
+            else:
+                dest = stem + ".mp3"
+                success, err = TRANSCODES.transcode(source, dest, quality)
+        finally:
+            if not success:
+                # Never leave "<name>.source.<ext>" behind in the music folder.
+                _remove_quietly(source)
+        _finish(i, success, err, dest if success else None)
+        return []
 
-            with _download_lock:
-                if download_id in DOWNLOAD_LOGS:
-                    DOWNLOAD_LOGS[download_id].append(f"[{i+1}/{total}] {search_q}")
-
-            success, err = download_single_ytdlp(search_q, quality, download_path, search_q)
-
-            with _download_lock:
-                ACTIVE_DOWNLOADS[download_id]["done"] = i + 1
-                if not success:
-                    failed_count += 1
-                    failed_tracks.append(track)
-                    if download_id in DOWNLOAD_LOGS:
-                        DOWNLOAD_LOGS[download_id].append(f"  ✗ Failed: {err}")
-                else:
-                    if download_id in DOWNLOAD_LOGS:
-                        DOWNLOAD_LOGS[download_id].append(f"  ✓ Done")
+    def _on_stats(stats):
+        with _updating(download_id):
+            ACTIVE_DOWNLOADS[download_id]["stages"] = stats
+
+    def _on_error(stage, item, exc):
+        indexes = item if stage == "resolve" else [item[0]]
+        for i in indexes:
+            _finish(i, False, str(exc))
+
+    stages = [
+        PipelineStage("resolve", _resolve, 1, 2),
+        PipelineStage("fetch", _fetch, fetchers, fetchers * 2),
+    ]
+    if separate_transcode:
+        stages.append(PipelineStage("transcode", _transcode, transcoders, transcoders * 2))
+
+    if outcomes:
+        with _updating(download_id):
+            for i, (ok, err) in outcomes.items():
+                if i >= total or i in settled:
+                    continue
+                settled.add(i)
+                finished += 1
+                table.finish(i, ok, err)
+                if not ok:
+                    errors[i] = err
+            ACTIVE_DOWNLOADS[download_id]["done"] = finished
+
+    # A small first batch lets the fetchers start while the rest is resolved.
+    indexes = [i for i in range(total) if i not in settled]
+    batches = [indexes[:fetchers]] + [
+        indexes[start:start + RESOLVE_BATCH_SIZE]
+        for start in range(fetchers, len(indexes), RESOLVE_BATCH_SIZE)
+    ]
+    TrackPipeline(f"ytdlp-{download_id}", stages, _on_stats, _on_error).run(batches)
+
+    failed_count = len(errors)
+
+    with _updating(download_id):
+        info = ACTIVE_DOWNLOADS[download_id]
+        if content_type == "track":
+            if failed_count:
+                info["status"] = "failed"
+                info["error"] = errors[0]
+            else:
+                info["status"] = "completed"
+            if download_id in DOWNLOAD_LOGS:
+                DOWNLOAD_LOGS[download_id].append(
+                    f"Failed: {errors[0]}" if failed_count else "Completed!"
+                )
+            return not failed_count
 
         # Store failed tracks for potential playback capture
-        with _download_lock:
-            ACTIVE_DOWNLOADS[download_id]["failed_tracks"] = failed_tracks
-            if failed_count == total:
-                ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
-                ACTIVE_DOWNLOADS[download_id]["error"] = "All tracks failed to download."
-            elif failed_count > 0:
-                ACTIVE_DOWNLOADS[download_id]["status"] = "completed"
-                ACTIVE_DOWNLOADS[download_id]["error"] = (
-                    f"{failed_count}/{total} tracks failed. "
-                    "Open the playlist and use Capture mode to record missing tracks."
-                )
-            else:
-                ACTIVE_DOWNLOADS[download_id]["status"] = "completed"
+        info["failed_tracks"] = table.failed_tracks()
+        if failed_count == total:
+            info["status"] = "failed"
+            info["error"] = "All tracks failed to download."
+        elif failed_count > 0:
+            info["status"] = "completed"
+            info["error"] = (
+                f"{failed_count}/{total} tracks failed. "
+                "Open the playlist and use Capture mode to record missing tracks."
+            )
+        else:
+            info["status"] = "completed"
 
-        logger.info(
-            f"[{download_id}] yt-dlp batch done: {total - failed_count}/{total} succeeded."
-        )
-        return failed_count < total
+    logger.info(
+        f"[{download_id}] yt-dlp batch done: {total - failed_count}/{total} succeeded."
+    )
+    return failed_count < total
 
 
 # ── Unified download worker ───────────────────────────────────────────────────
 
-def download_track(download_id, spotify_url, quality, download_path, engine=None, tracks=None):
+def download_track(download_id, spotify_url, quality, download_path, engine=None, tracks=None,
+                   outcomes=None):
     """Main download entry point. Picks engine, with automatic fallback.
 
     *tracks*: optional list of {name, spotify_url} dicts pre-resolved by the
     frontend via Spicetify.CosmosAsync — skips scraping when provided.
+    *outcomes*: journaled {index: (ok, error)} of tracks a yt-dlp run already finished.
     """
+    config = load_config()
     if engine is None:
-        engine = load_config().get("engine", "auto")
+        engine = config.get("engine", "auto")
 
     logger.info(f"[{download_id}] Engine: {engine}, pre-resolved tracks: {len(tracks) if tracks else 0}")
 
+    # Every track already on disk: nothing to search or download.
+    if tracks and config.get("skip_existing", True):
+        if all(LIBRARY.lookup_track(track) for track in tracks):
+            with _updating(download_id):
+                info = ACTIVE_DOWNLOADS[download_id]
+                info["total"] = info["done"] = info["skipped"] = len(tracks)
+                info["status"] = "completed"
+                if download_id in DOWNLOAD_LOGS:
+                    DOWNLOAD_LOGS[download_id].append(
+                        f"All {len(tracks)} tracks are already in your library."
+                    )
+            logger.info(f"[{download_id}] All tracks already in library; nothing to do.")
+            return
+
     def _reset_for_fallback(message):
-        with _download_lock:
+        with _updating(download_id):
             ACTIVE_DOWNLOADS[download_id]["status"] = "downloading"
             ACTIVE_DOWNLOADS[download_id]["done"] = 0
             ACTIVE_DOWNLOADS[download_id]["total"] = 0
@@ -966,7 +3594,7 @@ def download_track(download_id, spotify_url, quality, download_path, engine=None
                 download_with_spotdl(download_id, spotify_url, quality, download_path)
     elif engine == "ytdlp":
         success = download_with_ytdlp(
-            download_id, spotify_url, quality, download_path, tracks=tracks
+            download_id, spotify_url, quality, download_path, tracks=tracks, outcomes=outcomes
         )
         if not success and check_spotdl_installed():
             logger.info(f"[{download_id}] yt-dlp failed, falling back to spotdl...")
@@ -976,9 +3604,358 @@ def download_track(download_id, spotify_url, quality, download_path, engine=None
         download_with_spotdl(download_id, spotify_url, quality, download_path)
 
 
+def collection_download_path(download_path, folder_name):
+    """Return the per-playlist/album subfolder of *download_path*."""
+    safe_name = re.sub(r'[\\/:*?"<>|]', "_", folder_name or "").strip(". ")
+    return os.path.join(download_path, safe_name) if safe_name else download_path
+
+
+def prepare_and_download(download_id, spotify_url, quality, download_path, engine,
+                         tracks=None, collection_name="", resume=None):
+    """Scheduler entry point for a /download job.
+
+    Runs the slow setup (oEmbed folder lookup, dependency installs) that
+    used to block the HTTP request, then hands over to download_track.
+    *resume* ({"path", "outcomes"}) comes from the job journal after a restart.
+    """
+    with _updating(download_id):
+        ACTIVE_DOWNLOADS[download_id]["status"] = "starting"
+
+    # For playlists and albums: save into a named subfolder
+    parsed_type = parse_spotify_url(spotify_url)
+    if resume and resume.get("path"):
+        download_path = resume["path"]  # the folder picked before the restart
+    elif parsed_type and parsed_type[0] in ("playlist", "album"):
+        folder_name = collection_name  # prefer frontend-provided name
+        if not folder_name and not tracks:
+            # Only call oEmbed when the frontend gave us nothing
+            folder_name = spotify_url_to_search_query(spotify_url)
+        download_path = collection_download_path(download_path, folder_name)
+        if folder_name:
+            logger.info(f"Collection subfolder: {download_path}")
+        JOURNAL.append("path", download_id, path=download_path)
+
+    ok, err = ensure_dependencies(engine)
+    if not ok:
+        with _updating(download_id):
+            ACTIVE_DOWNLOADS[download_id]["status"] = "failed"
+            ACTIVE_DOWNLOADS[download_id]["error"] = err
+            if download_id in DOWNLOAD_LOGS:
+                DOWNLOAD_LOGS[download_id].append(f"Dependency check failed: {err}")
+        return
+
+    outcomes = resume.get("outcomes") if resume else None
+    download_track(download_id, spotify_url, quality, download_path, engine, tracks, outcomes)
+
+
+# ── Dependency install jobs ───────────────────────────────────────────────────
+
+INSTALL_JOBS = {}
+_install_job_counter = 0
+
+
+def run_install_job(job_id, install_engine):
+    """Background body of POST /install-deps; results land in INSTALL_JOBS."""
+    results = {}
+    errors = []
+    DEPENDENCIES.refresh()  # this is a background job, so it may pay for fresh probes
+
+    if install_engine in ("all", "spotdl"):
+        if not check_spotdl_installed():
+            if auto_install_spotdl():
+                results["spotdl"] = True
+            else:
+                results["spotdl"] = False
+                errors.append("Could not install spotdl")
+        else:
+            results["spotdl"] = True
+
+    if install_engine in ("all", "ytdlp"):
+        if not check_ytdlp_installed():
+            if auto_install_ytdlp():
+                results["ytdlp"] = True
+            else:
+                results["ytdlp"] = False
+                errors.append("Could not install yt-dlp")
+        else:
+            results["ytdlp"] = True
+
+    if not check_ffmpeg_installed():
+        auto_install_ffmpeg()
+
+    results["ffmpeg"] = check_ffmpeg_installed()
+    if not results["ffmpeg"]:
+        errors.append("Could not install FFmpeg")
+
+    results["error"] = "; ".join(errors) if errors else ""
+    with _download_lock:
+        INSTALL_JOBS[job_id].update(results)
+        INSTALL_JOBS[job_id]["status"] = "failed" if errors else "completed"
+
+
+# ── Captured tracks ───────────────────────────────────────────────────────────
+
+CAPTURE_MIN_BYTES = 4096
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def capture_extension(mime_type):
+    mime_type = mime_type or ""
+    if "webm" in mime_type:
+        return ".webm"
+    if "mp4" in mime_type or "aac" in mime_type:
+        return ".m4a"
+    if "mpeg" in mime_type or "mp3" in mime_type:
+        return ".mp3"
+    return ".ogg"
+
+
+def capture_folder(path=None):
+    dl_path = path or load_config().get("download_path", DEFAULT_CONFIG["download_path"])
+    os.makedirs(dl_path, exist_ok=True)
+    return dl_path
+
+
+def capture_temp_path(dl_path):
+    """A fresh hidden file in *dl_path*, on the same volume so the final rename is atomic."""
+    fd, tmp_path = tempfile.mkstemp(prefix=".capture-", suffix=".part", dir=dl_path)
+    os.close(fd)
+    return tmp_path
+
+
+def _unique_path(folder, stem, ext):
+    """Avoid overwriting existing files: "name.ext", "name (1).ext", ..."""
+    path = os.path.join(folder, stem + ext)
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, f"{stem} ({counter}){ext}")
+        counter += 1
+    return path
+
+
+def store_capture(tmp_path, track_name, mime_type, dl_path, transcode=False):
+    """Move a fully written capture into place and optionally queue MP3 conversion.
+
+    Returns the JSON result for the /capture-track endpoints.
+    """
+    track_name = (track_name or "captured_track").strip()
+    ext = capture_extension(mime_type)
+    safe_name = re.sub(r'[\\/:*?"<>|]', "_", track_name).strip(". ")
+    if not safe_name:
+        safe_name = "captured_track"
+
+    out_path = _unique_path(dl_path, safe_name, ext)
+    os.replace(tmp_path, out_path)
+    size = os.path.getsize(out_path)
+    logger.info(f"Captured track saved: {out_path} ({size} bytes)")
+    result = {"status": "saved", "path": out_path, "size": size}
+
+    # Optionally convert to MP3 in the shared transcode pool; the raw
+    # capture is replaced once the encode finishes.
+    if transcode and ext != ".mp3" and get_ffmpeg_path():
+        mp3_path = _unique_path(dl_path, safe_name, ".mp3")
+
+        def _indexed(success, err):
+            if success:
+                LIBRARY.add(mp3_path, title=track_name)
+
+        quality = load_config().get("quality", DEFAULT_CONFIG["quality"])
+        TRANSCODES.submit(out_path, mp3_path, quality, _indexed)
+        result.update(transcode="queued", mp3_path=mp3_path)
+    return result
+
+
+# ── Capture sessions ──────────────────────────────────────────────────────────
+#
+# A recording is uploaded while it is still in progress: the frontend opens
+# a session, appends each MediaRecorder chunk at an explicit byte offset and
+# finalizes when the track ends. A mismatched offset gets 409 plus the
+# server's offset, so a client can resume after a dropped connection.
+
+CAPTURE_SESSIONS = {}
+CAPTURE_SESSION_IDLE = 3600
+_capture_session_counter = 0
+_capture_lock = threading.Lock()
+
+
+def open_capture_session(data):
+    global _capture_session_counter
+    dl_path = capture_folder(data.get("path"))
+    tmp_path = capture_temp_path(dl_path)
+    with _capture_lock:
+        _capture_session_counter += 1
+        session_id = str(_capture_session_counter)
+        session = {
+            "id": session_id,
+            "name": data.get("name"),
+            "mime_type": data.get("mime_type", "audio/ogg"),
+            "path": dl_path,
+            "transcode": bool(data.get("transcode")),
+            "tmp_path": tmp_path,
+            "offset": 0,
+            "status": "open",
+            "result": None,
+            "error": "",
+            "updated_at": time.time(),
+            "lock": threading.Lock(),
+        }
+        CAPTURE_SESSIONS[session_id] = session
+    return session
+
+
+def capture_session_public(session):
+    return {
+        "id": session["id"],
+        "status": session["status"],
+        "offset": session["offset"],
+        "result": session["result"],
+        "error": session["error"],
+    }
+
+
+def finalize_capture_session(session):
+    """Background body of /capture-session/<id>/finalize."""
+    try:
+        if session["offset"] < CAPTURE_MIN_BYTES:
+            _remove_quietly(session["tmp_path"])
+            session.update(status="failed", error="Audio data too short — recording incomplete")
+            return
+        result = store_capture(
+            session["tmp_path"], session["name"], session["mime_type"], session["path"],
+            session["transcode"],
+        )
+        session.update(status="saved", result=result)
+    except Exception as e:
+        _remove_quietly(session["tmp_path"])
+        logger.error(f"Failed to save captured track: {e}")
+        session.update(status="failed", error=str(e))
+    finally:
+        session["updated_at"] = time.time()
+
+
+def cleanup_capture_sessions():
+    """Drop abandoned open sessions (and their temp files) and old finished ones."""
+    now = time.time()
+    with _capture_lock:
+        for session_id, session in list(CAPTURE_SESSIONS.items()):
+            idle = now - session["updated_at"]
+            if session["status"] == "open" and idle > CAPTURE_SESSION_IDLE:
+                _remove_quietly(session["tmp_path"])
+                del CAPTURE_SESSIONS[session_id]
+            elif session["status"] in ("saved", "failed") and idle > _CLEANUP_AGE:
+                del CAPTURE_SESSIONS[session_id]
+
+
+# ── Progress snapshots & event stream ─────────────────────────────────────────
+
+SSE_HEARTBEAT = 15.0
+TERMINAL_STATUSES = ("completed", "failed")
+# Version counters restart with the process; this keeps old ETags from matching.
+SERVER_INSTANCE = format(int(time.time() * 1000), "x")
+
+
+def make_etag(*parts):
+    """Strong ETag built from version counters of this server process."""
+    return '"' + "-".join(str(part) for part in (SERVER_INSTANCE,) + parts) + '"'
+
+
+def public_status(info):
+    """Status as shown to clients.
+
+    An engine can report "failed" and then hand over to a fallback engine,
+    so completed/failed are only published once the whole job has returned.
+    """
+    status = info["status"]
+    if status in TERMINAL_STATUSES and not info.get("finished"):
+        return "downloading"
+    return status
+
+
+def progress_payload(dl_id, info):
+    """JSON-ready progress for one download. Caller must hold _download_lock."""
+    done = info.get("done", 0)
+    total = info.get("total", 0)
+    status = public_status(info)
+    table = info.get("track_table")
+    payload = {
+        "id": dl_id, "status": status,
+        "done": done, "total": total,
+        "percent": round(done / total * 100) if total else 0,
+        "error": info.get("error", ""),
+        "collection": info.get("collection", ""),
+        "active_tracks": table.active_tracks() if table else [],
+        "track_progress": table.track_progress() if table else {},
+        "tracks_table": table.id if table else 0,
+        "tracks_version": table.version if table else 0,
+        "skipped": info.get("skipped", 0),
+        "stages": info.get("stages", {}),
+        "version": info.get("version", 0),
+    }
+    if status in TERMINAL_STATUSES:
+        # Only final jobs have a settled list; polls during a run stay small.
+        payload["failed_tracks"] = list(info.get("failed_tracks", []))
+    return payload
+
+
+def progress_snapshot(selector):
+    """Progress of several jobs from one _download_lock acquisition.
+
+    *selector* is "all", "active" (not yet completed/failed) or a
+    comma-separated list of ids; unknown ids are reported in "missing".
+    """
+    positions = SCHEDULER.positions()  # scheduler lock is taken before _download_lock
+    with _download_lock:
+        if selector in ("all", "active"):
+            ids = [
+                dl_id for dl_id, info in ACTIVE_DOWNLOADS.items()
+                if selector == "all" or public_status(info) not in TERMINAL_STATUSES
+            ]
+        else:
+            ids = [part.strip() for part in selector.split(",") if part.strip()]
+        downloads, missing = [], []
+        for dl_id in ids:
+            info = ACTIVE_DOWNLOADS.get(dl_id)
+            if info is None:
+                missing.append(dl_id)
+                continue
+            payload = progress_payload(dl_id, info)
+            payload["queue_position"] = positions.get(dl_id, 0) if payload["status"] == "queued" else 0
+            downloads.append(payload)
+        version = _state_version
+    return {"downloads": downloads, "missing": missing, "version": version}
+
+
+def progress_selector_tag(selector):
+    """Short ETag component identifying a /progress ``ids`` selector."""
+    if selector not in ("all", "active"):
+        selector = ",".join(part.strip() for part in selector.split(",") if part.strip())
+    return f"{zlib.crc32(selector.encode('utf-8')):08x}"
+
+
+def _sse_message(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
 # ── HTTP Handler ───────────────────────────────────────────────────────────────
 
+GZIP_MIN_BYTES = 1024  # smaller JSON bodies are not worth compressing
+GZIP_LEVEL = 1  # ~14x smaller progress bodies; higher levels cost more than they save locally
+KEEPALIVE_TIMEOUT = 60  # idle seconds before a kept-alive connection is dropped
+
+
 class DownloadRequestHandler(BaseHTTPRequestHandler):
+    # Persistent connections: the frontends poll every few seconds.  Every
+    # response carries a Content-Length except event streams, which close.
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body are separate writes; with Nagle on, a reused connection
+    # waits for the client's delayed ACK (~40 ms) before sending the body.
+    disable_nagle_algorithm = True
 
     def log_message(self, fmt, *args):
         logger.debug(f"[{self.address_string()}] {fmt % args}")
@@ -986,26 +3963,155 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
     def _cors_headers(self):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, X-Track-Name")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
 
     def do_OPTIONS(self):
+        self._read_body()
         self.send_response(204)
         self._cors_headers()
         self.end_headers()
 
-    def _json(self, code, data):
+    def _accepts_gzip(self):
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            coding, _, params = part.partition(";")
+            if coding.strip().lower() in ("gzip", "*"):
+                params = params.strip().replace(" ", "")
+                if params.startswith("q="):
+                    try:
+                        return float(params[2:]) > 0
+                    except ValueError:
+                        return False
+                return True
+        return False
+
+    def _json(self, code, data, etag=None):
         body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        compressible = len(body) >= GZIP_MIN_BYTES
+        gzipped = compressible and self._accepts_gzip()
+        if gzipped:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
         self.send_response(code)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if compressible:
+            self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            # no-cache: the client may keep the body but must revalidate each time.
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if self.close_connection:
+            # The request body was left unread; tell the client this socket is done.
+            self.send_header("Connection", "close")
         self._cors_headers()
         self.end_headers()
         self.wfile.write(body)
 
+    def _etag_matches(self, etag):
+        """True if the request's If-None-Match already names *etag*."""
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        tags = [tag.strip() for tag in header.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    def _not_modified(self, etag):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self._cors_headers()
+        self.end_headers()
+
+    def _fresh(self, etag):
+        """Answer 304 and return True when the client's copy for *etag* is current."""
+        if not self._etag_matches(etag):
+            return False
+        self._not_modified(etag)
+        return True
+
+    def _stream_events(self, dl_id=None):
+        """Server-Sent Events for one download (or all when *dl_id* is None).
+
+        Sends ``progress`` when a job's version changes, ``log`` for new log
+        lines and a final ``done`` for a single-job stream.  The global stream
+        also sends ``removed`` once a job it reported has been cleaned up.
+        Between changes the thread sleeps on _download_changed, so idle jobs
+        cost nothing.
+        """
+        with _download_lock:
+            known = dl_id is None or dl_id in ACTIVE_DOWNLOADS
+        if not known:
+            self._json(404, {"error": "Unknown download id"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self._cors_headers()
+        self.end_headers()
+        self.close_connection = True
+
+        sent_versions = {}
+        # A single-job stream replays that job's buffered log; the global
+        # stream only forwards lines written after the client connected.
+        log_cursors = {}
+        if dl_id is None:
+            with _download_lock:
+                log_cursors = {k: log.next_seq - 1 for k, log in DOWNLOAD_LOGS.items()}
+        seen_state = -1
+
+        while True:
+            messages = []
+            finished = False
+            with _download_changed:
+                if seen_state == _state_version:
+                    _download_changed.wait(SSE_HEARTBEAT)
+                if seen_state != _state_version:
+                    seen_state = _state_version
+                    ids = [dl_id] if dl_id is not None else list(ACTIVE_DOWNLOADS)
+                    for job_id in ids:
+                        info = ACTIVE_DOWNLOADS.get(job_id)
+                        if info is None:
+                            finished = finished or job_id == dl_id
+                            continue
+                        log = DOWNLOAD_LOGS.get(job_id)
+                        if log is not None:
+                            for seq, line in log.since(log_cursors.get(job_id, 0)):
+                                messages.append(("log", {"id": job_id, "seq": seq, "line": line}))
+                            log_cursors[job_id] = log.next_seq - 1
+                        if info.get("version", 0) != sent_versions.get(job_id):
+                            sent_versions[job_id] = info.get("version", 0)
+                            payload = progress_payload(job_id, info)
+                            is_done = job_id == dl_id and payload["status"] in TERMINAL_STATUSES
+                            messages.append(("done" if is_done else "progress", payload))
+                            finished = finished or is_done
+                    if dl_id is None:
+                        for job_id in [k for k in sent_versions if k not in ACTIVE_DOWNLOADS]:
+                            del sent_versions[job_id]
+                            log_cursors.pop(job_id, None)
+                            messages.append(("removed", {"id": job_id}))
+
+            try:
+                if not messages:
+                    self.wfile.write(b": keepalive\n\n")
+                for event, data in messages:
+                    if event in ("progress", "done") and data["status"] == "queued":
+                        data["queue_position"] = SCHEDULER.position(data["id"])
+                    self.wfile.write(_sse_message(event, data, seen_state))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError, OSError):
+                return
+            if finished:
+                return
+
     # ── GET ────────────────────────────────────────────────────────────────
 
     def do_GET(self):
         parsed = urlparse(self.path)
+        self._read_body()  # a stray GET body must not be parsed as the next request
 
         if parsed.path == "/health":
             config = load_config()
@@ -1017,55 +4123,178 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
 
         elif parsed.path == "/config":
             config = load_config()
-            config["spotdl_installed"] = check_spotdl_installed()
-            config["ytdlp_installed"] = check_ytdlp_installed()
-            config["ffmpeg_installed"] = check_ffmpeg_installed()
+            etag = make_etag("config", CONFIG.version, DEPENDENCIES.version)
+            if self._fresh(etag):
+                return
+            pending = DEPENDENCIES.pending(("spotdl", "ytdlp", "ffmpeg"))
+            # None while the startup probe is still running, not False.
+            config["deps_pending"] = bool(pending)
+            config["spotdl_installed"] = None if "spotdl" in pending else check_spotdl_installed()
+            config["ytdlp_installed"] = None if "ytdlp" in pending else check_ytdlp_installed()
+            config["ffmpeg_installed"] = None if "ffmpeg" in pending else check_ffmpeg_installed()
             config["ffprobe_installed"] = get_ffprobe_path() is not None
+            config["ytdlp_embedded_available"] = import_yt_dlp() is not None
             if check_spotdl_installed():
                 ver = get_spotdl_version()
                 config["spotdl_version"] = f"{ver[0]}.{ver[1]}.{ver[2]}"
             else:
                 config["spotdl_version"] = "N/A"
-            self._json(200, config)
+            self._json(200, config, etag)
 
         elif parsed.path == "/status":
             with _download_lock:
-                active_ids = [
-                    k for k, v in ACTIVE_DOWNLOADS.items()
-                    if v["status"] in ("starting", "downloading")
-                ]
-                all_ids = list(ACTIVE_DOWNLOADS.keys())
-            self._json(200, {"status": "ok", "active": active_ids, "downloads": all_ids})
+                etag = make_etag("state", _state_version)
+                if not self._etag_matches(etag):
+                    active_ids = [
+                        k for k, v in ACTIVE_DOWNLOADS.items()
+                        if v["status"] in ("queued", "starting", "downloading")
+                    ]
+                    all_ids = list(ACTIVE_DOWNLOADS.keys())
+                else:
+                    all_ids = None
+            if all_ids is None:
+                self._not_modified(etag)
+            else:
+                self._json(200, {"status": "ok", "active": active_ids, "downloads": all_ids}, etag)
+
+        elif parsed.path == "/progress":
+            # ?ids=1,2,3, ?ids=active (the default) or ?ids=all
+            selector = parse_qs(parsed.query).get("ids", ["active"])[0]
+            selector_tag = progress_selector_tag(selector)
+            with _download_lock:
+                version = _state_version
+            if self._fresh(make_etag("state", version, selector_tag)):
+                return
+            snapshot = progress_snapshot(selector)
+            self._json(200, snapshot, make_etag("state", snapshot["version"], selector_tag))
+
+        elif parsed.path.startswith("/progress/") and parsed.path.endswith("/tracks"):
+            # ?since=<version> returns only rows changed after that version;
+            # a different "table" means the rows were replaced (engine fallback).
+            dl_id = parsed.path[len("/progress/"):-len("/tracks")]
+            query = parse_qs(parsed.query)
+            try:
+                since = int(query["since"][0]) if "since" in query else 0
+            except ValueError:
+                self._json(400, {"error": "Invalid since version"})
+                return
+            payload = etag = None
+            with _download_lock:
+                info = ACTIVE_DOWNLOADS.get(dl_id)
+                table = info.get("track_table") if info is not None else None
+                if table:
+                    etag = make_etag("tracks", table.id, table.version, since)
+                elif info is not None:
+                    etag = make_etag("tracks", 0, info.get("version", 0), since)
+                if info is not None and not self._etag_matches(etag):
+                    payload = {
+                        "id": dl_id,
+                        "table": table.id if table else 0,
+                        "version": table.version if table else 0,
+                        "total": len(table.rows) if table else info.get("total", 0),
+                        "rows": table.since(since) if table else [],
+                    }
+            if info is None:
+                self._json(404, {"error": "Unknown download id"})
+            elif payload is None:
+                self._not_modified(etag)
+            else:
+                self._json(200, payload, etag)
 
         elif parsed.path.startswith("/progress/"):
             dl_id = parsed.path.split("/progress/", 1)[1]
+            position = SCHEDULER.position(dl_id)  # scheduler lock before _download_lock
+            payload = etag = None
             with _download_lock:
                 info = ACTIVE_DOWNLOADS.get(dl_id)
+                if info is not None:
+                    etag = make_etag("job", info.get("version", 0), position)
+                    if not self._etag_matches(etag):
+                        payload = progress_payload(dl_id, info)
             if info is None:
                 self._json(404, {"error": "Unknown download id"})
+            elif payload is None:
+                self._not_modified(etag)
             else:
-                done = info.get("done", 0)
-                total = info.get("total", 0)
-                pct = round(done / total * 100) if total else 0
-                self._json(200, {
-                    "id": dl_id, "status": info["status"],
-                    "done": done, "total": total, "percent": pct,
-                    "error": info.get("error", ""),
-                    "collection": info.get("collection", ""),
-                    "failed_tracks": info.get("failed_tracks", []),
-                })
+                payload["queue_position"] = position if payload["status"] == "queued" else 0
+                self._json(200, payload, etag)
+
+        elif parsed.path == "/events" or parsed.path.startswith("/events/"):
+            dl_id = parsed.path[len("/events/"):] if parsed.path.startswith("/events/") else None
+            self._stream_events(dl_id)
+
+        elif parsed.path == "/queue":
+            self._json(200, SCHEDULER.snapshot())
 
         elif parsed.path.startswith("/logs/"):
+            # ?since=<seq> returns only newer lines; "next" is the cursor for
+            # the following call and "evicted" counts lines that fell out of
+            # the ring buffer before the client caught up.
             dl_id = parsed.path.split("/logs/", 1)[1]
+            query = parse_qs(parsed.query)
+            try:
+                since = int(query["since"][0]) if "since" in query else None
+            except ValueError:
+                self._json(400, {"error": "Invalid since cursor"})
+                return
             with _download_lock:
-                lines = list(DOWNLOAD_LOGS.get(dl_id, []))
-            self._json(200, {"id": dl_id, "lines": lines[-50:]})
+                log = DOWNLOAD_LOGS.get(dl_id)
+                if log is None:
+                    entries, first_seq, next_seq = [], 1, 1
+                else:
+                    entries = log.tail(LOG_TAIL_LINES) if since is None else log.since(since)
+                    first_seq, next_seq = log.first_seq, log.next_seq
+            evicted = max(0, first_seq - (since + 1)) if since is not None else 0
+            self._json(200, {
+                "id": dl_id,
+                "lines": [line for _, line in entries],
+                "first_seq": entries[0][0] if entries else next_seq,
+                "next": next_seq - 1,
+                "evicted": evicted,
+                "gap": evicted > 0,
+            })
+
+        elif parsed.path.startswith("/install-deps/"):
+            job_id = parsed.path.split("/install-deps/", 1)[1]
+            with _download_lock:
+                job = dict(INSTALL_JOBS[job_id]) if job_id in INSTALL_JOBS else None
+            if job is None:
+                self._json(404, {"error": "Unknown install job id"})
+            else:
+                self._json(200, job)
+
+        elif parsed.path == "/library":
+            self._json(200, dict(LIBRARY_JOB, tracks=LIBRARY.count(), db=LIBRARY.path))
+
+        elif parsed.path.startswith("/capture-session/"):
+            session = CAPTURE_SESSIONS.get(parsed.path.split("/")[2])
+            if session:
+                self._json(200, capture_session_public(session))
+            else:
+                self._json(404, {"error": "Unknown capture session"})
+
+        elif parsed.path == "/stats":
+            self._json(200, {
+                "resolution_cache": RESOLUTIONS.stats(),
+                "transcode": TRANSCODES.stats(),
+                "dependencies": DEPENDENCIES.stats(),
+                "spotify": {
+                    "connections": SPOTIFY_HTTP.stats(),
+                    "oembed_cache": SPOTIFY_TITLES.stats(),
+                    "embed_cache": SPOTIFY_TRACKLISTS.stats(),
+                },
+            })
 
         elif parsed.path == "/check-deps":
+            etag = make_etag("deps", DEPENDENCIES.version)
+            if self._fresh(etag):
+                return
+            pending = DEPENDENCIES.pending(("spotdl", "ytdlp", "ffmpeg"))
             result = {
-                "spotdl": check_spotdl_installed(),
-                "ytdlp": check_ytdlp_installed(),
-                "ffmpeg": check_ffmpeg_installed(),
+                "pending": bool(pending),
+                "spotdl": None if "spotdl" in pending else check_spotdl_installed(),
+                "ytdlp": None if "ytdlp" in pending else check_ytdlp_installed(),
+                "ffmpeg": None if "ffmpeg" in pending else check_ffmpeg_installed(),
                 "ffprobe": get_ffprobe_path() is not None,
                 "ffmpeg_path": get_ffmpeg_path() or "",
             }
@@ -1074,18 +4303,145 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 result["spotdl_version"] = f"{ver[0]}.{ver[1]}.{ver[2]}"
             else:
                 result["spotdl_version"] = "N/A"
-            self._json(200, result)
+            self._json(200, result, etag)
 
         else:
             self._json(404, {"error": "Not found"})
 
     # ── POST ───────────────────────────────────────────────────────────────
 
+    def _read_body(self):
+        """Read the whole (small) request body so the connection can be reused."""
+        return b"".join(self._body_chunks())
+
+    def _body_chunks(self):
+        """Yield the request body in UPLOAD_CHUNK_SIZE pieces.
+
+        Handles both Content-Length and ``Transfer-Encoding: chunked`` bodies,
+        so uploads never have to fit in memory.
+        """
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            while True:
+                size_line = self.rfile.readline(1024)
+                if not size_line:
+                    raise ValueError("Connection closed mid-upload")
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip optional trailers up to the terminating blank line.
+                    while self.rfile.readline(1024).strip():
+                        pass
+                    return
+                while size > 0:
+                    chunk = self.rfile.read(min(size, UPLOAD_CHUNK_SIZE))
+                    if not chunk:
+                        raise ValueError("Connection closed mid-upload")
+                    size -= len(chunk)
+                    yield chunk
+                self.rfile.readline(1024)  # CRLF after each chunk
+        else:
+            remaining = int(self.headers.get("Content-Length", 0))
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK_SIZE))
+                if not chunk:
+                    raise ValueError("Connection closed mid-upload")
+                remaining -= len(chunk)
+                yield chunk
+
+    def _capture_raw(self, query):
+        """POST /capture-track/raw — the captured audio itself is the request body.
+
+        Track name, MIME type, folder and ``transcode`` come from the query
+        string (or X-Track-Name / Content-Type headers). The body is streamed
+        to a temporary file and renamed into place once complete.
+        """
+        def param(key, header=None):
+            values = query.get(key)
+            if values:
+                return values[0]
+            value = self.headers.get(header) if header else None
+            return unquote(value) if value else None
+
+        if ("chunked" not in self.headers.get("Transfer-Encoding", "").lower()
+                and "Content-Length" not in self.headers):
+            self._json(411, {"error": "Content-Length or chunked transfer encoding required"})
+            return
+
+        name = param("name", "X-Track-Name")
+        mime_type = param("mime_type", "Content-Type") or "audio/ogg"
+        transcode = param("transcode") in ("1", "true", "yes")
+        tmp_path = None
+        try:
+            dl_path = capture_folder(param("path"))
+            tmp_path = capture_temp_path(dl_path)
+            size = 0
+            with open(tmp_path, "wb") as f:
+                for chunk in self._body_chunks():
+                    f.write(chunk)
+                    size += len(chunk)
+            if size < CAPTURE_MIN_BYTES:
+                _remove_quietly(tmp_path)
+                self._json(400, {"error": "Audio data too short — recording incomplete"})
+                return
+            self._json(200, store_capture(tmp_path, name, mime_type, dl_path, transcode))
+        except Exception as e:
+            if tmp_path:
+                _remove_quietly(tmp_path)
+            logger.error(f"Failed to save captured track: {e}")
+            self.close_connection = True
+            self._json(500, {"error": str(e)})
+
+    def _capture_append(self, session_id, query):
+        """POST /capture-session/<id>/append?offset=N — raw chunk appended at byte N."""
+        session = CAPTURE_SESSIONS.get(session_id)
+        if not session:
+            self.close_connection = True
+            self._json(404, {"error": "Unknown capture session"})
+            return
+        try:
+            offset = int(query.get("offset", ["-1"])[0])
+        except ValueError:
+            offset = -1
+        if not session["lock"].acquire(blocking=False):
+            self.close_connection = True
+            self._json(409, {"error": "Another append is in progress", "offset": session["offset"]})
+            return
+        try:
+            if session["status"] != "open":
+                self.close_connection = True
+                self._json(409, {"error": f"Session is {session['status']}", "offset": session["offset"]})
+                return
+            if offset != session["offset"]:
+                self.close_connection = True
+                self._json(409, {"error": "Offset mismatch", "offset": session["offset"]})
+                return
+            try:
+                with open(session["tmp_path"], "ab") as f:
+                    for chunk in self._body_chunks():
+                        f.write(chunk)
+                        session["offset"] += len(chunk)
+            except Exception as e:
+                # Whatever arrived stays on disk; the client resumes from "offset".
+                logger.warning(f"Capture session {session_id} append interrupted: {e}")
+                self.close_connection = True
+                self._json(500, {"error": str(e), "offset": session["offset"]})
+                return
+            finally:
+                session["updated_at"] = time.time()
+            self._json(200, {"offset": session["offset"]})
+        finally:
+            session["lock"].release()
+
     def do_POST(self):
-        global _download_counter
+        global _download_counter, _install_job_counter
         parsed = urlparse(self.path)
-        content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length)
+        if parsed.path == "/capture-track/raw":
+            self._capture_raw(parse_qs(parsed.query))
+            return
+        m = re.match(r"^/capture-session/(\w+)/append$", parsed.path)
+        if m:
+            self._capture_append(m.group(1), parse_qs(parsed.query))
+            return
+        body = self._read_body()
 
         if parsed.path == "/download":
             try:
@@ -1112,44 +4468,39 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
             tracks = data.get("tracks", None)  # list of {name, spotify_url}
             collection_name = data.get("collection_name", "").strip()
 
-            # For playlists and albums: save into a named subfolder
             parsed_type = parse_spotify_url(spotify_url)
-            if parsed_type and parsed_type[0] in ("playlist", "album"):
-                folder_name = collection_name  # prefer frontend-provided name
-                if not folder_name and not tracks:
-                    # Only call oEmbed when the frontend gave us nothing
-                    folder_name = spotify_url_to_search_query(spotify_url)
-                if folder_name:
-                    safe_name = re.sub(r'[\\/:*?"<>|]', "_", folder_name).strip(". ")
-                    if safe_name:
-                        download_path = os.path.join(download_path, safe_name)
-                        logger.info(f"Collection subfolder: {download_path}")
-
-            ok, err = ensure_dependencies(engine)
-            if not ok:
-                self._json(503, {"error": err})
-                return
 
             # Determine initial total so frontend progress bar shows instantly
             initial_total = len(tracks) if tracks else 0
 
+            try:
+                priority = int(data["priority"]) if "priority" in data else default_job_priority(
+                    parsed_type[0] if parsed_type else "", initial_total
+                )
+            except (TypeError, ValueError):
+                self._json(400, {"error": "Invalid priority"})
+                return
+
             with _download_lock:
                 _download_counter += 1
                 download_id = str(_download_counter)
                 ACTIVE_DOWNLOADS[download_id] = {
-                    "url": spotify_url, "status": "starting",
+                    "url": spotify_url, "status": "queued",
                     "done": 0, "total": initial_total, "error": "",
                     "started_at": time.time(), "engine": engine,
-                    "collection": collection_name,
+                    "collection": collection_name, "priority": priority,
                 }
-                DOWNLOAD_LOGS[download_id] = collections.deque(maxlen=500)
+                DOWNLOAD_LOGS[download_id] = DownloadLog()
+                _mark_changed(download_id)
 
-            t = threading.Thread(
-                target=download_track,
-                args=(download_id, spotify_url, quality, download_path, engine, tracks),
-                daemon=True,
+            JOURNAL.append(
+                "job", download_id, url=spotify_url, quality=quality, path=download_path,
+                engine=engine, tracks=tracks, collection=collection_name, priority=priority,
+            )
+            SCHEDULER.submit(
+                download_id, priority, prepare_and_download,
+                (download_id, spotify_url, quality, download_path, engine, tracks, collection_name),
             )
-            t.start()
 
             self._json(200, {
                 "status": "started",
@@ -1157,8 +4508,27 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 "download_id": download_id,
                 "engine": engine,
                 "total": initial_total,
+                "priority": priority,
+                "queue_position": SCHEDULER.position(download_id),
             })
 
+        elif parsed.path in ("/library/rebuild", "/library/verify"):
+            try:
+                data = json.loads(body.decode("utf-8")) if body else {}
+            except Exception:
+                self._json(400, {"error": "Invalid JSON"})
+                return
+            if LIBRARY_JOB["status"] == "running":
+                self._json(409, {"error": "A library job is already running"})
+                return
+            action = parsed.path.rsplit("/", 1)[1]
+            root = data.get("path") or load_config().get("download_path", DEFAULT_CONFIG["download_path"])
+            LIBRARY_JOB.update(status="running", action=action, result=None, error="")
+            threading.Thread(
+                target=run_library_job, args=(action, root), name=f"library-{action}", daemon=True,
+            ).start()
+            self._json(202, {"status": "started", "action": action, "path": root})
+
         elif parsed.path == "/save-config":
             try:
                 data = json.loads(body.decode("utf-8"))
@@ -1174,7 +4544,21 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 config["port"] = data["port"]
             if "engine" in data and data["engine"] in ("auto", "spotdl", "ytdlp"):
                 config["engine"] = data["engine"]
-            save_config(config)
+            if "ytdlp_mode" in data and data["ytdlp_mode"] in ("subprocess", "embedded"):
+                config["ytdlp_mode"] = data["ytdlp_mode"]
+            if "spotdl_mode" in data and data["spotdl_mode"] in ("subprocess", "worker"):
+                config["spotdl_mode"] = data["spotdl_mode"]
+            if "max_parallel_tracks" in data:
+                config["max_parallel_tracks"] = get_max_parallel_tracks(data)
+            if "audio_mode" in data and data["audio_mode"] in ("mp3", "passthrough"):
+                config["audio_mode"] = data["audio_mode"]
+            if "skip_existing" in data:
+                config["skip_existing"] = bool(data["skip_existing"])
+            if "max_concurrent_jobs" in data:
+                config["max_concurrent_jobs"] = get_config_int(data, "max_concurrent_jobs", MAX_CONCURRENT_JOBS_LIMIT)
+            if "max_child_processes" in data:
+                config["max_child_processes"] = get_config_int(data, "max_child_processes", MAX_CHILD_PROCESSES_LIMIT)
+            save_config(config)  # subscribers apply the new limits
             self._json(200, {"status": "saved"})
 
         elif parsed.path == "/install-deps":
@@ -1184,38 +4568,45 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 data = {}
             install_engine = data.get("engine", "all")
 
-            results = {}
-            errors = []
-
-            if install_engine in ("all", "spotdl"):
-                if not check_spotdl_installed():
-                    if auto_install_spotdl():
-                        results["spotdl"] = True
-                    else:
-                        results["spotdl"] = False
-                        errors.append("Could not install spotdl")
-                else:
-                    results["spotdl"] = True
-
-            if install_engine in ("all", "ytdlp"):
-                if not check_ytdlp_installed():
-                    if auto_install_ytdlp():
-                        results["ytdlp"] = True
-                    else:
-                        results["ytdlp"] = False
-                        errors.append("Could not install yt-dlp")
-                else:
-                    results["ytdlp"] = True
-
-            if not check_ffmpeg_installed():
-                auto_install_ffmpeg()
-
-            results["ffmpeg"] = check_ffmpeg_installed()
-            if not results["ffmpeg"]:
-                errors.append("Could not install FFmpeg")
+            with _download_lock:
+                _install_job_counter += 1
+                job_id = str(_install_job_counter)
+                INSTALL_JOBS[job_id] = {"id": job_id, "status": "running", "engine": install_engine}
+            threading.Thread(
+                target=run_install_job, args=(job_id, install_engine),
+                name=f"install-{job_id}", daemon=True,
+            ).start()
+            self._json(202, {"status": "started", "job_id": job_id})
+
+        elif parsed.path == "/capture-session":
+            try:
+                data = json.loads(body.decode("utf-8")) if body else {}
+            except Exception:
+                self._json(400, {"error": "Invalid JSON"})
+                return
+            try:
+                session = open_capture_session(data)
+            except Exception as e:
+                logger.error(f"Could not open capture session: {e}")
+                self._json(500, {"error": str(e)})
+                return
+            self._json(201, {"session_id": session["id"], "offset": 0})
 
-            results["error"] = "; ".join(errors) if errors else ""
-            self._json(200 if not errors else 503, results)
+        elif re.match(r"^/capture-session/\w+/finalize$", parsed.path):
+            session = CAPTURE_SESSIONS.get(parsed.path.split("/")[2])
+            if not session:
+                self._json(404, {"error": "Unknown capture session"})
+                return
+            with session["lock"]:
+                if session["status"] != "open":
+                    self._json(409, {"error": f"Session is {session['status']}"})
+                    return
+                session["status"] = "finalizing"
+            threading.Thread(
+                target=finalize_capture_session, args=(session,),
+                name=f"capture-{session['id']}", daemon=True,
+            ).start()
+            self._json(202, capture_session_public(session))
 
         elif parsed.path == "/capture-track":
             # Save audio captured by the frontend via MediaRecorder (Soggfy-style)
@@ -1226,49 +4617,29 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 self._json(400, {"error": "Invalid JSON"})
                 return
 
-            track_name = (data.get("name") or "captured_track").strip()
-            audio_b64   = data.get("data", "")
-            mime_type   = data.get("mime_type", "audio/ogg")
-            config      = load_config()
-            dl_path     = data.get("path") or config.get("download_path", DEFAULT_CONFIG["download_path"])
-
+            audio_b64 = data.get("data", "")
             if not audio_b64:
                 self._json(400, {"error": "No audio data"})
                 return
 
-            ext = ".ogg"
-            if "webm" in mime_type:
-                ext = ".webm"
-            elif "mp4" in mime_type or "aac" in mime_type:
-                ext = ".m4a"
-            elif "mpeg" in mime_type or "mp3" in mime_type:
-                ext = ".mp3"
-
-            safe_name = re.sub(r'[\\/:*?"<>|]', "_", track_name).strip(". ")
-            if not safe_name:
-                safe_name = "captured_track"
-
+            tmp_path = None
             try:
                 audio_bytes = base64.b64decode(audio_b64)
-                if len(audio_bytes) < 4096:
+                if len(audio_bytes) < CAPTURE_MIN_BYTES:
                     self._json(400, {"error": "Audio data too short — recording incomplete"})
                     return
-
-                os.makedirs(dl_path, exist_ok=True)
-                out_path = os.path.join(dl_path, safe_name + ext)
-
-                # Avoid overwriting existing files
-                counter = 1
-                while os.path.exists(out_path):
-                    out_path = os.path.join(dl_path, f"{safe_name} ({counter}){ext}")
-                    counter += 1
-
-                with open(out_path, "wb") as f:
+                dl_path = capture_folder(data.get("path"))
+                tmp_path = capture_temp_path(dl_path)
+                with open(tmp_path, "wb") as f:
                     f.write(audio_bytes)
-
-                logger.info(f"Captured track saved: {out_path} ({len(audio_bytes)} bytes)")
-                self._json(200, {"status": "saved", "path": out_path, "size": len(audio_bytes)})
+                result = store_capture(
+                    tmp_path, data.get("name"), data.get("mime_type", "audio/ogg"), dl_path,
+                    data.get("transcode"),
+                )
+                self._json(200, result)
             except Exception as e:
+                if tmp_path:
+                    _remove_quietly(tmp_path)
                 logger.error(f"Failed to save captured track: {e}")
                 self._json(500, {"error": str(e)})
 
@@ -1278,8 +4649,10 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
 
 # ── Reusable HTTP Server ──────────────────────────────────────────────────────
 
-class ReusableHTTPServer(HTTPServer):
+class ReusableHTTPServer(ThreadingHTTPServer):
+    """One thread per connection so long POSTs never stall /progress or /health polls."""
     allow_reuse_address = True
+    daemon_threads = True
 
 
 # ── Entry point ────────────────────────────────────────────────────────────────
@@ -1291,24 +4664,8 @@ def run_server(port=None):
     dl_path = config.get("download_path", DEFAULT_CONFIG["download_path"])
     os.makedirs(dl_path, exist_ok=True)
 
-    logger.info("Checking dependencies...")
-    spotdl_ok = check_spotdl_installed()
-    ytdlp_ok = check_ytdlp_installed()
-    ffmpeg_ok = check_ffmpeg_installed()
-    logger.info(f"SpotDL : {'OK' if spotdl_ok else 'MISSING'}")
-    logger.info(f"yt-dlp : {'OK' if ytdlp_ok else 'MISSING'}")
-    logger.info(f"FFmpeg : {'OK' if ffmpeg_ok else 'MISSING'} ({get_ffmpeg_path() or 'not found'})")
-    logger.info(f"Engine : {config.get('engine', 'spotdl')}")
-
-    # Auto-install missing deps in background
-    if not spotdl_ok:
-        threading.Thread(target=auto_install_spotdl, daemon=True).start()
-    if not ytdlp_ok:
-        threading.Thread(target=auto_install_ytdlp, daemon=True).start()
-    if not ffmpeg_ok:
-        threading.Thread(target=auto_install_ffmpeg, daemon=True).start()
-
     threading.Thread(target=_cleanup_loop, daemon=True).start()
+    apply_runtime_limits(config)
 
     try:
         httpd = ReusableHTTPServer(("127.0.0.1", port), DownloadRequestHandler)
@@ -1324,6 +4681,10 @@ def run_server(port=None):
         logger.error(f"Cannot bind to port {port}. Close any program using it and retry.")
         sys.exit(1)
 
+    # Probing spotdl/yt-dlp takes seconds; the socket is already listening.
+    threading.Thread(target=_dependency_loop, args=(config,), daemon=True).start()
+    resume_journaled_jobs()
+
     logger.info(f"Spicetify Downloader server on http://localhost:{port}")
     logger.info(f"Download folder : {dl_path}")
     logger.info(f"Default quality : {config.get('quality', '320')} kbps")
@@ -1336,5 +4697,30 @@ def run_server(port=None):
         httpd.server_close()
 
 
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Spicetify Downloader backend server")
+    parser.add_argument("--port", type=int, help="port to listen on (default: config.json)")
+    parser.add_argument(
+        "--rebuild-library", nargs="?", const="", metavar="FOLDER",
+        help="index existing music files (default: the configured download folder) and exit",
+    )
+    parser.add_argument(
+        "--verify-library", action="store_true",
+        help="drop index entries whose files are gone and exit",
+    )
+    args = parser.parse_args(argv)
+
+    if args.rebuild_library is not None:
+        root = args.rebuild_library or load_config().get("download_path", DEFAULT_CONFIG["download_path"])
+        print(json.dumps(LIBRARY.rebuild(root)))
+        return
+    if args.verify_library:
+        kept, removed = LIBRARY.verify()
+        print(json.dumps({"kept": kept, "removed": removed}))
+        return
+    run_server(args.port)
+
+
 if __name__ == "__main__":
-    run_server()
+    main()
@@ -6,17 +6,19 @@
   var serverOnline = false;
   var activeDownload = null;
   var progressPollTimer = null;
+  var progressEvents = null; // EventSource for /events/<id> when supported
   var rowRenderTimer = null;
+  var trackStates = null; // per-track rows of the active download, from /progress/<id>/tracks
   var nativeClickHooked = false;
   var resolvedTracklist = null; // { tracks: [{name, spotify_url}], collectionName: "" }
 
   // ── OGG Playback Recorder (Soggfy-style) ─────────────────────────
   var _recorder = null;
-  var _recChunks = [];
   var _recTrackName = "";
   var _recDownloadPath = "";
   var _captureMode = false; // true while user has enabled capture
   var _capturedCount = 0;
+  var CAPTURE_MIN_BYTES = 4096; // shorter recordings are dropped (server rejects them too)
 
   function _getAudioElement() {
     // Try Spicetify internal reference first
@@ -36,39 +38,180 @@
     _recorder = null;
   }
 
-  function _saveRecording() {
-    if (!_recChunks.length || !_recTrackName) return;
-    var chunks = _recChunks.slice();
-    _recChunks = [];
-    var mimeType = chunks[0] && chunks[0].type ? chunks[0].type : "audio/ogg";
+  // Fallback for servers without capture sessions: one raw upload at the end.
+  function _uploadWholeRecording(chunks, trackName, downloadPath, mimeType) {
     var blob = new Blob(chunks, { type: mimeType });
-    if (blob.size < 4096) return; // too small — skip
-
-    var reader = new FileReader();
-    reader.onload = function () {
-      var b64 = reader.result.split(",")[1] || "";
-      fetch(API_URL + "/capture-track", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          name: _recTrackName,
-          data: b64,
-          mime_type: mimeType,
-          path: _recDownloadPath,
-        }),
+    if (blob.size < CAPTURE_MIN_BYTES) return; // too small — skip
+
+    var query =
+      "?name=" + encodeURIComponent(trackName) +
+      "&mime_type=" + encodeURIComponent(mimeType) +
+      "&transcode=1" +
+      (downloadPath ? "&path=" + encodeURIComponent(downloadPath) : "");
+    // Raw body: no base64/FileReader copy; the server streams it to disk.
+    fetch(API_URL + "/capture-track/raw" + query, {
+      method: "POST",
+      headers: { "Content-Type": mimeType },
+      body: blob,
+    })
+      .then(function (r) { return r.json(); })
+      .then(function (d) {
+        if (d.status === "saved") {
+          _capturedCount++;
+          Spicetify.showNotification(
+            "✅ Captured: " + trackName + " (" + Math.round(blob.size / 1024) + " KB)"
+          );
+        }
       })
+      .catch(function () {});
+  }
+
+  // Streams one recording to the backend while it is still playing:
+  // open a capture session, append each MediaRecorder chunk at its byte
+  // offset, finalize once the recorder stops. On a dropped connection the
+  // server's offset (409 / error replies) tells us where to resume.
+  function _createCaptureUpload(trackName, downloadPath, mimeType) {
+    var sessionId = null;
+    var fallback = false;
+    var queue = []; // Blobs not yet confirmed by the server
+    var all = []; // every chunk, kept only for the fallback upload
+    var offset = 0;
+    var total = 0;
+    var sending = false;
+    var finished = false;
+    var retries = 0;
+
+    function giveUp() {
+      queue = [];
+      finished = false;
+      console.warn("[SpicetifyDownloader] Capture upload abandoned:", trackName);
+    }
+
+    function retryLater() {
+      retries++;
+      if (retries > 5) return giveUp();
+      setTimeout(pump, 1000 * retries);
+    }
+
+    function resync(serverOffset) {
+      var skip = serverOffset - offset;
+      if (skip < 0) return giveUp(); // server lost data we no longer hold
+      if (skip > 0) {
+        var pending = new Blob(queue, { type: mimeType });
+        queue = skip < pending.size ? [pending.slice(skip)] : [];
+      }
+      offset = serverOffset;
+    }
+
+    // 202 only means the save was queued; the session's status tells how it went.
+    function waitForSave(attempt) {
+      fetch(API_URL + "/capture-session/" + sessionId)
         .then(function (r) { return r.json(); })
         .then(function (d) {
           if (d.status === "saved") {
             _capturedCount++;
             Spicetify.showNotification(
-              "✅ Captured: " + _recTrackName + " (" + Math.round(blob.size / 1024) + " KB)"
+              "✅ Captured: " + trackName + " (" + Math.round(total / 1024) + " KB)"
             );
+          } else if (d.status === "failed") {
+            Spicetify.showNotification(
+              "Capture failed: " + trackName + (d.error ? " — " + d.error : ""),
+              true
+            );
+          } else if (attempt < 120) {
+            setTimeout(function () { waitForSave(attempt + 1); }, 1000);
           }
         })
+        .catch(function () {
+          if (attempt < 120) setTimeout(function () { waitForSave(attempt + 1); }, 2000);
+        });
+    }
+
+    function finalize() {
+      finished = false;
+      var tooShort = total < CAPTURE_MIN_BYTES;
+      // Finalize even a too-short recording so the server drops its temp file,
+      // but do not count or announce it.
+      fetch(API_URL + "/capture-session/" + sessionId + "/finalize", { method: "POST" })
+        .then(function (r) {
+          if (r.status === 202 && !tooShort) waitForSave(0);
+        })
         .catch(function () {});
+    }
+
+    function pump() {
+      if (!sessionId || sending) return;
+      if (!queue.length) {
+        if (finished) finalize();
+        return;
+      }
+      sending = true;
+      var count = queue.length;
+      fetch(API_URL + "/capture-session/" + sessionId + "/append?offset=" + offset, {
+        method: "POST",
+        headers: { "Content-Type": "application/octet-stream" },
+        body: new Blob(queue.slice(0, count), { type: mimeType }),
+      })
+        .then(function (r) {
+          return r.json().then(function (d) { return { status: r.status, data: d }; });
+        })
+        .then(function (res) {
+          sending = false;
+          if (res.status === 200) {
+            queue.splice(0, count);
+            offset = res.data.offset;
+            retries = 0;
+            pump();
+          } else if (typeof res.data.offset === "number") {
+            resync(res.data.offset);
+            retryLater();
+          } else {
+            giveUp();
+          }
+        })
+        .catch(function () {
+          sending = false;
+          retryLater();
+        });
+    }
+
+    fetch(API_URL + "/capture-session", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        name: trackName,
+        mime_type: mimeType,
+        path: downloadPath,
+        transcode: true,
+      }),
+    })
+      .then(function (r) {
+        if (r.status !== 201) throw new Error("HTTP " + r.status);
+        return r.json();
+      })
+      .then(function (d) {
+        sessionId = d.session_id;
+        all = [];
+        pump();
+      })
+      .catch(function () {
+        fallback = true;
+        if (finished) _uploadWholeRecording(all, trackName, downloadPath, mimeType);
+      });
+
+    return {
+      push: function (blob) {
+        total += blob.size;
+        queue.push(blob);
+        if (!sessionId) all.push(blob);
+        pump();
+      },
+      finish: function () {
+        finished = true;
+        if (fallback) _uploadWholeRecording(all, trackName, downloadPath, mimeType);
+        else pump();
+      },
     };
-    reader.readAsDataURL(blob);
   }
 
   function _startRecording(trackName, downloadPath) {
@@ -105,12 +248,18 @@
       return false;
     }
 
-    _recChunks = [];
     _recTrackName = trackName;
     _recDownloadPath = downloadPath;
 
+    var upload = _createCaptureUpload(
+      trackName, downloadPath, _recorder.mimeType || mimeType || "audio/ogg"
+    );
     _recorder.ondataavailable = function (e) {
-      if (e.data && e.data.size > 0) _recChunks.push(e.data);
+      if (e.data && e.data.size > 0) upload.push(e.data);
+    };
+    // "stop" fires after the final dataavailable, so nothing is cut off.
+    _recorder.onstop = function () {
+      upload.finish();
     };
     _recorder.onerror = function (e) {
       console.warn("[SpicetifyDownloader] MediaRecorder error:", e);
@@ -124,9 +273,8 @@
   // Called when the playing song changes while capture mode is active
   function _onSongChangeCapture() {
     if (!_captureMode) return;
-    // Save the previous track
+    // Finish the previous track; its upload is finalized when the recorder stops
     _stopRecording();
-    _saveRecording();
 
     // Start recording the new track
     try {
@@ -163,7 +311,6 @@
   function stopCaptureMode() {
     _captureMode = false;
     _stopRecording();
-    _saveRecording();
     Spicetify.showNotification(
       "⏹ Capture mode OFF — " + _capturedCount + " track(s) saved."
     );
@@ -469,6 +616,14 @@
     });
   }
 
+  function removeRowProgress(row) {
+    var cell = getRowNumberCell(row);
+    var mount = cell && cell.querySelector(".sd-row-progress");
+    if (!mount) return;
+    cell.classList.remove("sd-track-cell");
+    mount.remove();
+  }
+
   function upsertRowProgress(row, state, percent) {
     var cell = getRowNumberCell(row);
     if (!cell) return;
@@ -516,7 +671,8 @@
     }
   }
 
-  function renderPerTrackProgress() {
+  // changed: optional list of track indexes to repaint; omitted = every visible row
+  function renderPerTrackProgress(changed) {
     ensureStyles();
 
     if (!activeDownload) {
@@ -533,6 +689,11 @@
     var rows = getTrackRows();
     if (!rows.length) return;
 
+    if (trackStates && trackStates.id === activeDownload.id && trackStates.table) {
+      renderTrackRows(rows, changed);
+      return;
+    }
+
     var done = activeDownload.done || 0;
     var total = activeDownload.total || 0;
     var status = activeDownload.status || "downloading";
@@ -565,6 +726,75 @@
     });
   }
 
+  function renderTrackRows(rows, changed) {
+    var indexes =
+      changed ||
+      rows.map(function (_, index) {
+        return index;
+      });
+    indexes.forEach(function (index) {
+      var row = rows[index];
+      if (!row) return;
+      var state = trackStates.rows[index];
+      if (!state) {
+        removeRowProgress(row); // pending
+      } else if (state.status === "completed" || state.status === "skipped") {
+        upsertRowProgress(row, "completed");
+      } else if (state.status === "failed") {
+        upsertRowProgress(row, "failed");
+      } else {
+        upsertRowProgress(row, "active", state.percent > 0 ? state.percent : null);
+      }
+    });
+  }
+
+  // Fetch only the track rows that changed since the last call, then repaint those.
+  function loadTrackRows(downloadId, table, version) {
+    if (!trackStates || trackStates.id !== downloadId) {
+      trackStates = {
+        id: downloadId,
+        table: 0,
+        version: 0,
+        wanted: 0,
+        rows: {},
+        loading: false,
+      };
+    }
+    var states = trackStates;
+    if (table === states.table && version <= states.version) return;
+    states.wanted = Math.max(states.wanted, version);
+    if (states.loading) return;
+    states.loading = true;
+
+    var since = table === states.table ? states.version : 0;
+    fetch(API_URL + "/progress/" + downloadId + "/tracks?since=" + since)
+      .then(function (res) {
+        return res.json();
+      })
+      .then(function (data) {
+        states.loading = false;
+        if (trackStates !== states) return;
+        var replaced = data.table !== states.table;
+        if (replaced) {
+          states.table = data.table;
+          states.rows = {};
+        }
+        var changed = [];
+        (data.rows || []).forEach(function (r) {
+          states.rows[r.i] = r;
+          changed.push(r.i);
+        });
+        states.version = data.version || 0;
+        renderPerTrackProgress(replaced ? undefined : changed);
+        if (states.wanted > states.version) {
+          loadTrackRows(downloadId, states.table, states.wanted);
+        }
+      })
+      .catch(function () {
+        states.loading = false;
+      });
+  }
+
   function startRowRenderLoop() {
     if (rowRenderTimer) return;
     rowRenderTimer = setInterval(renderPerTrackProgress, 1200);
@@ -588,86 +818,95 @@
       });
   }
 
-  // ── Progress polling ─────────────────────────────────────────────────────
+  // ── Progress updates (SSE with polling fallback) ─────────────────────────
 
-  function pollProgress(downloadId) {
-    if (progressPollTimer) clearInterval(progressPollTimer);
+  function stopProgressUpdates() {
+    if (progressPollTimer) {
+      clearInterval(progressPollTimer);
+      progressPollTimer = null;
+    }
+    if (progressEvents) {
+      progressEvents.close();
+      progressEvents = null;
+    }
+  }
+
+  function handleProgress(downloadId, data) {
+    if (activeDownload && activeDownload.id === downloadId) {
+      activeDownload.status = data.status;
+      activeDownload.done = data.done || 0;
+      activeDownload.total = data.total || 0;
+      activeDownload.percent = data.percent || 0;
+    }
+    if (data.tracks_table) {
+      loadTrackRows(downloadId, data.tracks_table, data.tracks_version || 0);
+    } else {
+      renderPerTrackProgress();
+    }
+
+    if (data.status === "completed") {
+      stopProgressUpdates();
+      isDownloading = false;
+      var msg = "Download complete! Files saved to your Music folder.";
+      if (data.error) {
+        msg += " (" + data.error + ")";
+      }
+      Spicetify.showNotification(msg);
+
+      // Offer capture mode if there were failed tracks in a collection
+      var failedTracks = data.failed_tracks || [];
+      if (failedTracks.length > 0 && activeDownload && activeDownload.context) {
+        var ctx = activeDownload.context;
+        var ctxUrl = "https://open.spotify.com/" + ctx.type + "/" + ctx.id;
+        setTimeout(function () {
+          showQualityModal(ctxUrl, null, failedTracks);
+        }, 500);
+      }
 
+      setTimeout(function () {
+        activeDownload = null;
+        renderPerTrackProgress();
+      }, 12000);
+    } else if (data.status === "failed") {
+      stopProgressUpdates();
+      isDownloading = false;
+      var failMsg = data.error || "Download failed.";
+      fetch(API_URL + "/logs/" + downloadId)
+        .then(function (r) {
+          return r.json();
+        })
+        .then(function (logData) {
+          var lines = (logData.lines || []).filter(function (l) {
+            var ll = l.toLowerCase();
+            return (
+              ll.indexOf("error") !== -1 ||
+              ll.indexOf("failed") !== -1 ||
+              ll.indexOf("exception") !== -1
+            );
+          });
+          if (lines.length) {
+            failMsg = lines[lines.length - 1].slice(0, 120);
+          }
+          Spicetify.showNotification("Download failed: " + failMsg, true);
+        })
+        .catch(function () {
+          Spicetify.showNotification("Download failed: " + failMsg, true);
+        });
+      setTimeout(function () {
+        activeDownload = null;
+        renderPerTrackProgress();
+      }, 15000);
+    }
+  }
+
+  function startPolling(downloadId) {
     function pollOnce() {
       fetch(API_URL + "/progress/" + downloadId)
         .then(function (res) {
           return res.json();
         })
         .then(function (data) {
-          if (activeDownload && activeDownload.id === downloadId) {
-            activeDownload.status = data.status;
-            activeDownload.done = data.done || 0;
-            activeDownload.total = data.total || 0;
-            activeDownload.percent = data.percent || 0;
-          }
-          renderPerTrackProgress();
-
-          if (data.status === "downloading") {
-            // keep polling
-          } else if (data.status === "completed") {
-            if (progressPollTimer) {
-              clearInterval(progressPollTimer);
-              progressPollTimer = null;
-            }
-            isDownloading = false;
-            var msg = "Download complete! Files saved to your Music folder.";
-            if (data.error) {
-              msg += " (" + data.error + ")";
-            }
-            Spicetify.showNotification(msg);
-
-            // Offer capture mode if there were failed tracks in a collection
-            var failedTracks = data.failed_tracks || [];
-            if (failedTracks.length > 0 && activeDownload && activeDownload.context) {
-              var ctx = activeDownload.context;
-              var ctxUrl = "https://open.spotify.com/" + ctx.type + "/" + ctx.id;
-              setTimeout(function () {
-                showQualityModal(ctxUrl, null, failedTracks);
-              }, 500);
-            }
-
-            setTimeout(function () {
-              activeDownload = null;
-              renderPerTrackProgress();
-            }, 12000);
-          } else if (data.status === "failed") {
-            if (progressPollTimer) {
-              clearInterval(progressPollTimer);
-              progressPollTimer = null;
-            }
-            isDownloading = false;
-            var failMsg = data.error || "Download failed.";
-            fetch(API_URL + "/logs/" + downloadId)
-              .then(function (r) {
-                return r.json();
-              })
-              .then(function (logData) {
-                var lines = (logData.lines || []).filter(function (l) {
-                  var ll = l.toLowerCase();
-                  return (
-                    ll.indexOf("error") !== -1 ||
-                    ll.indexOf("failed") !== -1 ||
-                    ll.indexOf("exception") !== -1
-                  );
-                });
-                if (lines.length) {
-                  failMsg = lines[lines.length - 1].slice(0, 120);
-                }
-                Spicetify.showNotification("Download failed: " + failMsg, true);
-              })
-              .catch(function () {
-                Spicetify.showNotification("Download failed: " + failMsg, true);
-              });
-            setTimeout(function () {
-              activeDownload = null;
-              renderPerTrackProgress();
-            }, 15000);
-          }
+          handleProgress(downloadId, data);
         })
         .catch(function () {
           /* server temporarily unreachable, keep polling */
@@ -678,6 +917,34 @@
     progressPollTimer = setInterval(pollOnce, 2000);
   }
 
+  function pollProgress(downloadId) {
+    stopProgressUpdates();
+
+    if (typeof EventSource === "undefined") {
+      startPolling(downloadId);
+      return;
+    }
+
+    // The server pushes "progress" on every change and "done" once finished.
+    progressEvents = new EventSource(API_URL + "/events/" + downloadId);
+    progressEvents.addEventListener("progress", function (e) {
+      handleProgress(downloadId, JSON.parse(e.data));
+    });
+    progressEvents.addEventListener("done", function (e) {
+      handleProgress(downloadId, JSON.parse(e.data));
+    });
+    progressEvents.onerror = function () {
+      // Stream dropped (old server, restart…) — fall back to polling.
+      if (progressEvents) {
+        progressEvents.close();
+        progressEvents = null;
+      }
+      if (isDownloading && activeDownload && activeDownload.id === downloadId) {
+        startPolling(downloadId);
+      }
+    };
+  }
+
   // ── Download trigger ─────────────────────────────────────────────────────
 
   function startDownload(url, quality) {
@@ -727,6 +994,11 @@
       })
       .then(function (data) {
         if (data.status === "started") {
+          if (data.queue_position > 0) {
+            Spicetify.showNotification(
+              "Download queued (#" + data.queue_position + ") — it will start automatically.",
+            );
+          }
           if (activeDownload) {
             activeDownload.id = data.download_id;
             // Update total from server (in case backend adjusted it)
@@ -45,8 +45,9 @@ function StatusBadge({ online }) {
   );
 }
 
+// ok is null while the server is still probing for the dependency.
 function DepsBadge({ label, ok }) {
-  const color = ok ? "#1DB954" : "#f59e0b";
+  const color = ok ? "#1DB954" : ok === null ? "#b3b3b3" : "#f59e0b";
   return react.createElement(
     "span",
     {
@@ -66,7 +67,7 @@ function DepsBadge({ label, ok }) {
         background: color,
       },
     }),
-    `${label}: ${ok ? "OK" : "Missing"}`,
+    `${label}: ${ok ? "OK" : ok === null ? "Checking\u2026" : "Missing"}`,
   );
 }
 
@@ -111,36 +112,15 @@ function IndeterminateBar() {
   );
 }
 
-function DownloadCard({ id }) {
-  const [info, setInfo] = react.useState({
-    status: "starting",
-    done: 0,
-    total: 0,
-    percent: 0,
-    error: "",
-  });
-
-  react.useEffect(() => {
-    let active = true;
-    const poll = async () => {
-      try {
-        const data = await fetchJSON(`/progress/${id}`);
-        if (active) setInfo(data);
-        if (active && data.status !== "completed" && data.status !== "failed") {
-          setTimeout(poll, 2000);
-        }
-      } catch {
-        if (active) setTimeout(poll, 4000);
-      }
-    };
-    poll();
-    return () => {
-      active = false;
-    };
-  }, [id]);
+function DownloadCard({ info }) {
+  const id = info.id;
 
   const statusLabel =
     {
+      queued:
+        info.queue_position > 0
+          ? `Queued (#${info.queue_position})`
+          : "Queued\u2026",
       starting: "Starting\u2026",
       downloading:
         info.total > 0
@@ -158,7 +138,10 @@ function DownloadCard({ id }) {
         : "#b3b3b3";
 
   // Show indeterminate bar when starting/total unknown, real bar when total>0
-  const showBar = info.status === "downloading" || info.status === "starting";
+  const showBar =
+    info.status === "downloading" ||
+    info.status === "starting" ||
+    info.status === "queued";
   const showRealBar = showBar && info.total > 0;
   const showSpinBar = showBar && info.total === 0;
 
@@ -221,24 +204,69 @@ function SettingsPage() {
     }
   }, []);
 
+  // Fallback when the /events stream is unavailable: one /progress request
+  // for every card. Resolves to true while any download is still running.
   const loadDownloads = react.useCallback(async () => {
     try {
-      const data = await fetchJSON("/status");
-      setDownloads(data.downloads || []);
-    } catch {}
+      const data = await fetchJSON("/progress?ids=all");
+      const list = data.downloads || [];
+      setDownloads(list);
+      return list.some((d) => d.status !== "completed" && d.status !== "failed");
+    } catch {
+      return false;
+    }
   }, []);
 
   // Poll server every 5s
   react.useEffect(() => {
     loadConfig();
-    loadDownloads();
-    const id = setInterval(() => {
-      loadConfig();
-      loadDownloads();
-    }, 5000);
+    const id = setInterval(loadConfig, 5000);
     return () => clearInterval(id);
   }, []);
 
+  // Progress: one /events stream for every card. Without SSE (or once the
+  // stream errors) poll /progress every 2s while something is running,
+  // otherwise every 5s.
+  react.useEffect(() => {
+    let active = true;
+    let timer = null;
+    let events = null;
+    const tick = async () => {
+      const busy = await loadDownloads();
+      if (active) timer = setTimeout(tick, busy ? 2000 : 5000);
+    };
+    if (typeof EventSource === "undefined") {
+      tick();
+    } else {
+      // The stream opens with a "progress" event for every known job.
+      const jobs = new Map();
+      const publish = () => setDownloads(Array.from(jobs.values()));
+      const update = (e) => {
+        const info = JSON.parse(e.data);
+        jobs.set(info.id, info);
+        publish();
+      };
+      events = new EventSource(`${API_URL}/events`);
+      events.addEventListener("progress", update);
+      events.addEventListener("done", update);
+      events.addEventListener("removed", (e) => {
+        jobs.delete(JSON.parse(e.data).id);
+        publish();
+      });
+      events.onerror = () => {
+        // Server restarted or too old for /events — fall back to polling.
+        events.close();
+        events = null;
+        if (active) tick();
+      };
+    }
+    return () => {
+      active = false;
+      clearTimeout(timer);
+      if (events) events.close();
+    };
+  }, []);
+
   const handleSave = async () => {
     setSaving(true);
     try {
@@ -249,6 +277,8 @@ function SettingsPage() {
           path: config.download_path,
           quality: config.quality,
           engine: config.engine,
+          max_parallel_tracks: config.max_parallel_tracks,
+          audio_mode: config.audio_mode,
         }),
       });
       Spicetify.showNotification("Settings saved!");
@@ -270,7 +300,12 @@ function SettingsPage() {
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ engine: "all" }),
       });
-      const data = await res.json();
+      let data = await res.json();
+      // The server installs in the background; poll the job until it finishes.
+      while (data.job_id && (data.status === "started" || data.status === "running")) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        data = { job_id: data.job_id, ...(await fetchJSON(`/install-deps/${data.job_id}`)) };
+      }
       if (data.spotdl && data.ytdlp && data.ffmpeg) {
         Spicetify.showNotification("All dependencies installed!");
       } else {
@@ -292,9 +327,9 @@ function SettingsPage() {
 
   const anyDepsMissing =
     config &&
-    (!config.spotdl_installed ||
-      !config.ytdlp_installed ||
-      !config.ffmpeg_installed);
+    (config.spotdl_installed === false ||
+      config.ytdlp_installed === false ||
+      config.ffmpeg_installed === false);
 
   return react.createElement(
     "div",
@@ -397,8 +432,8 @@ function SettingsPage() {
     downloads.length > 0 &&
       sect(
         label("Active Downloads"),
-        ...downloads.map((id) =>
-          react.createElement(DownloadCard, { key: id, id }),
+        ...downloads.map((info) =>
+          react.createElement(DownloadCard, { key: info.id, info }),
         ),
       ),
 
@@ -491,6 +526,62 @@ function SettingsPage() {
           ),
         ),
 
+        sect(
+          label("Audio Format"),
+          react.createElement(
+            "select",
+            {
+              className: "sd-select",
+              value: config.audio_mode || "mp3",
+              onChange: (e) =>
+                setConfig({ ...config, audio_mode: e.target.value }),
+            },
+            react.createElement(
+              "option",
+              { value: "mp3" },
+              "MP3 \u2014 Always convert",
+            ),
+            react.createElement(
+              "option",
+              { value: "passthrough" },
+              "Original \u2014 Keep Opus/AAC when good enough (faster)",
+            ),
+          ),
+          react.createElement(
+            "p",
+            { className: "sd-hint" },
+            "Original skips re-encoding for yt-dlp downloads whose source already matches the selected quality. Requires FFmpeg.",
+          ),
+        ),
+
+        sect(
+          label("Parallel Downloads"),
+          react.createElement(
+            "select",
+            {
+              className: "sd-select",
+              value: String(config.max_parallel_tracks || 3),
+              onChange: (e) =>
+                setConfig({
+                  ...config,
+                  max_parallel_tracks: parseInt(e.target.value, 10),
+                }),
+            },
+            ...[1, 2, 3, 4, 6, 8].map((n) =>
+              react.createElement(
+                "option",
+                { key: n, value: String(n) },
+                n === 1 ? "1 track at a time" : `${n} tracks at a time`,
+              ),
+            ),
+          ),
+          react.createElement(
+            "p",
+            { className: "sd-hint" },
+            "How many playlist tracks yt-dlp downloads at once. Lower this if YouTube starts throttling.",
+          ),
+        ),
+
         sect(
           react.createElement(
             "button",